@@ -1,5 +1,14 @@
+import os
+import sys
+
+# Usa o núcleo único de prod_and_inverse_prod; a precisão é escolhida pelo perfil
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "prod_and_inverse_prod"))
+
 from inverseProdOfTwoVariables import InverseProdOfTwoVariables
 
+# "fast", "standard" ou "reference" (ver precisionProfiles)
+PRECISION_PROFILE = "standard"
+
 if __name__ == "__main__":
     
     muX = 467.0483        
@@ -8,7 +17,7 @@ if __name__ == "__main__":
     sigmaY = 0.6667      
     
     try:
-        analyzer = InverseProdOfTwoVariables(muX, sigmaX, muY, sigmaY)
+        analyzer = InverseProdOfTwoVariables(muX, sigmaX, muY, sigmaY, profile=PRECISION_PROFILE)
         c_solution = analyzer.solve_inverse_cdf()
 
         print(f"{c_solution}")
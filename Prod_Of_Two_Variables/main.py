@@ -1,5 +1,14 @@
+import os
+import sys
+
+# Usa o núcleo único de prod_and_inverse_prod; a precisão é escolhida pelo perfil
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "prod_and_inverse_prod"))
+
 from prodOfTwoVariables import ProdOfNormalRVs
 
+# "fast", "standard" ou "reference" (ver precisionProfiles)
+PRECISION_PROFILE = "standard"
+
 if __name__ == "__main__":
 
     muX=112461.03097441
@@ -19,7 +28,7 @@ if __name__ == "__main__":
     #c = 1591.3746;      # Single value for computation
 
     try:
-        analyzer = ProdOfNormalRVs(muX, sigmaX, muY, sigmaY, c)
+        analyzer = ProdOfNormalRVs(muX, sigmaX, muY, sigmaY, c, profile=PRECISION_PROFILE)
         std_dev = analyzer.solve_cdf()
         probability = analyzer.compute_product_cdf_1d(c)
         erro_percentual = analyzer.get_relative_error()
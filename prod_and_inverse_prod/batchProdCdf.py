@@ -0,0 +1,119 @@
+import numpy as np
+from functools import lru_cache
+from scipy.special import ndtr
+from closedFormProd import classify
+
+# |mu_v| / sigma_v abaixo disso: V tem massa perto de zero e o integrando tem um "joelho" em v = 0
+STRADDLE_SIGMAS = 8.0
+SPLIT_N_SIGMAS = 10.0
+
+
+@lru_cache(maxsize=8)
+def _hermite_nodes(n_nodes: int):
+    """Nós e pesos de Gauss-Hermite já normalizados para a N(0, 1)"""
+    t, w = np.polynomial.hermite.hermgauss(n_nodes)
+    return np.sqrt(2.0) * t, w / np.sqrt(np.pi)
+
+
+@lru_cache(maxsize=8)
+def _split_nodes(n_nodes: int):
+    """Nós de Gauss-Legendre em [0, 1] com mudança v = L*s^3, que concentra nós perto de zero"""
+    t, w = np.polynomial.legendre.leggauss(n_nodes)
+    s = (t + 1.0) / 2.0
+    return s**3, (w / 2.0) * 3.0 * s**2
+
+
+def _conditional_prob(v, c, mu_w, sigma_w):
+    """P(V*W <= c | V = v) para arrays já broadcastados"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (c / v - mu_w) / sigma_w
+        # v > 0: P(W <= c/v) ; v < 0: P(W >= c/v)
+        prob = ndtr(np.where(v > 0, z, -z))
+    # W constante (sigma_w = 0): o degrau de v mu_w <= c, sem o 0/0 em c = v mu_w
+    prob = np.where(sigma_w == 0, (v * mu_w <= c).astype(np.float64), prob)
+    return np.where(v == 0, (c >= 0).astype(np.float64), prob)
+
+
+def _conditional_pdf(v, c, mu_w, sigma_w):
+    """Densidade de V*W em c dado V = v: phi((c/v - mu_w)/sigma_w) / (sigma_w |v|)"""
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        z = (c / v - mu_w) / sigma_w
+        pdf = np.exp(-0.5 * z * z) / (np.sqrt(2.0 * np.pi) * sigma_w * np.abs(v))
+    return np.where(v == 0, 0.0, pdf)
+
+
+def _orient(muX, sigmaX, muY, sigmaY):
+    """Condiciona na variável de menor coeficiente de variação (mais concentrada longe de zero)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cv_x = np.where(muX != 0, sigmaX / np.abs(muX), np.inf)
+        cv_y = np.where(muY != 0, sigmaY / np.abs(muY), np.inf)
+    cond_y = cv_y < cv_x
+    return (
+        np.where(cond_y, muY, muX), np.where(cond_y, sigmaY, sigmaX),
+        np.where(cond_y, muX, muY), np.where(cond_y, sigmaX, sigmaY),
+    )
+
+
+def _expectation(kernel, muX, sigmaX, muY, sigmaY, c, n_nodes, chunk_size) -> np.ndarray:
+    """E_V[kernel(V, c, mu_w, sigma_w)] com as mesmas regras de nós para CDF e PDF"""
+    muX, sigmaX, muY, sigmaY, c = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (muX, sigmaX, muY, sigmaY, c))
+    )
+    shape = c.shape
+    mu_v, sigma_v, mu_w, sigma_w = (a.ravel() for a in _orient(muX, sigmaX, muY, sigmaY))
+    c = c.ravel()
+
+    gh_nodes, gh_weights = _hermite_nodes(n_nodes)
+    sp_nodes, sp_weights = _split_nodes(n_nodes // 2)
+    straddle = np.abs(mu_v) < STRADDLE_SIGMAS * sigma_v
+    result = np.empty(c.size)
+
+    for start in range(0, c.size, chunk_size):
+        sl = slice(start, start + chunk_size)
+        mv, sv = mu_v[sl, None], sigma_v[sl, None]
+        mw, sw, cc = mu_w[sl, None], sigma_w[sl, None], c[sl, None]
+
+        v = mv + sv * gh_nodes
+        res = kernel(v, cc, mw, sw) @ gh_weights
+
+        lanes = np.flatnonzero(straddle[sl])
+        if lanes.size:
+            mv, sv, mw, sw, cc = (a[lanes] for a in (mv, sv, mw, sw, cc))
+            res_split = np.zeros(lanes.size)
+            # Integra cada lado de zero separadamente, com os nós concentrados em v = 0
+            for L in (mv - SPLIT_N_SIGMAS * sv, mv + SPLIT_N_SIGMAS * sv):
+                v = L * sp_nodes
+                pdf_v = np.exp(-0.5 * ((v - mv) / sv)**2) / (sv * np.sqrt(2.0 * np.pi))
+                res_split += (kernel(v, cc, mw, sw) * pdf_v * np.abs(L)) @ sp_weights
+            res[lanes] = res_split
+
+        result[sl] = res
+
+    return result.reshape(shape)
+
+
+def compute_product_cdf_batch(muX, sigmaX, muY, sigmaY, c, n_nodes: int = 128, chunk_size: int = 4096) -> np.ndarray:
+    """
+    Calcula P(XY <= c) para vetores de parâmetros de uma só vez.
+
+    Condiciona na variável de menor coeficiente de variação (V) e integra
+    P(W <= c/V) com quadratura de nós fixos, tudo em operações de array:
+    Gauss-Hermite quando V está longe de zero e Gauss-Legendre dividido
+    em v = 0 quando V cruza o zero. Os argumentos são broadcastados entre si.
+    Células degeneradas (sigma = 0 ou mu = 0, ver closedFormProd) saem em forma fechada.
+    """
+    prob = np.clip(_expectation(_conditional_prob, muX, sigmaX, muY, sigmaY, c, n_nodes, chunk_size), 0.0, 1.0)
+    muX, sigmaX, muY, sigmaY, c = (a.ravel() for a in np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (muX, sigmaX, muY, sigmaY, c))
+    ))
+    flat = prob.reshape(-1)
+    for i in np.flatnonzero((sigmaX == 0) | (sigmaY == 0) | (muX == 0) | (muY == 0)):
+        closed_form = classify(muX[i], sigmaX[i], muY[i], sigmaY[i])
+        if closed_form is not None:
+            flat[i] = closed_form.cdf(c[i])
+    return flat.reshape(prob.shape)[()]
+
+
+def compute_product_pdf_batch(muX, sigmaX, muY, sigmaY, c, n_nodes: int = 128, chunk_size: int = 4096) -> np.ndarray:
+    """Densidade de XY em c, com os mesmos nós de compute_product_cdf_batch"""
+    return np.maximum(_expectation(_conditional_pdf, muX, sigmaX, muY, sigmaY, c, n_nodes, chunk_size), 0.0)
@@ -0,0 +1,179 @@
+"""
+Inversa vetorizada: resolve P(XY <= c) = p para todas as células de uma partição de uma vez.
+
+Em vez de um brentq por célula (uma thread cada no main), o intervalo e as
+iterações andam em arrays sobre o motor vetorizado de batchProdCdf. Cada
+célula é uma faixa:
+
+1. intervalo inicial: chute normal muX muY + std ndtri(p) +- BRACKET_N_SIGMAS std;
+   nas faixas sem mudança de sinal a ponta do lado errado passa a ser a outra
+   ponta e avança um passo que dobra a cada tentativa;
+2. Illinois (regula falsi que divide por 2 o resíduo da ponta que ficou parada
+   duas vezes seguidas), com bissecção se o ponto cair fora do intervalo.
+
+Cada rodada chama o motor uma vez, só com as faixas ainda ativas: as que
+convergem saem das chamadas seguintes. Como na inversa escalar, a partir de
+tail_p o resíduo é log(1 - p) - log P(XY > c), com P(XY > c) = P((-X)Y <= -c)
+direto do motor (sem o cancelamento de 1 - CDF), e abaixo disso é F(c) - p; os
+dois crescem com c. Células degeneradas (ver closedFormProd) saem em forma
+fechada, com zero avaliações.
+
+Com uma superfície de quantis (ver quantileSurface), as células que ela cobre
+começam no valor tabelado e dão até POLISH_STEPS passos de Newton com CDF e
+densidade do motor; as que fecham com passo abaixo da tolerância não passam
+pelos itens 1 e 2, e as outras seguem com o ponto polido como chute.
+"""
+import numpy as np
+from scipy.special import ndtri
+from batchProdCdf import compute_product_cdf_batch, compute_product_pdf_batch
+from closedFormProd import classify
+
+BRACKET_N_SIGMAS = 3.0
+MAX_EXPAND = 60
+MAX_ITER = 100
+POLISH_STEPS = 2
+
+
+class BatchPpfResult:
+    """
+    c: soluções no formato das células; iterations: avaliações do motor por faixa (polimento,
+    que conta CDF e densidade como uma, intervalo e Illinois); converged: faixas que convergiram
+    (as outras ficam com o último ponto, ou nan)
+    """
+
+    def __init__(self, c: np.ndarray, iterations: np.ndarray, converged: np.ndarray):
+        self.c = c
+        self.iterations = iterations
+        self.converged = converged
+
+
+def _residual(lanes, c, muX, sigmaX, muY, sigmaY, p, tail, n_nodes, slope: bool = False):
+    """
+    Resíduo crescente em c nas faixas lanes (F - p, ou log(1 - p) - log S na cauda); com slope,
+    (resíduo, derivada em c), com a densidade nos mesmos nós
+    """
+    flip = np.where(tail[lanes], -1.0, 1.0)
+    cells = (flip * muX[lanes], sigmaX[lanes], muY[lanes], sigmaY[lanes], flip * c)
+    prob = compute_product_cdf_batch(*cells, n_nodes=n_nodes)
+    with np.errstate(divide='ignore'):
+        log_sf = np.log(np.maximum(prob, np.finfo(float).tiny))
+        residual = np.where(tail[lanes], np.log1p(-p[lanes]) - log_sf, prob - p[lanes])
+    if not slope:
+        return residual
+    # A densidade de (-X)Y em -c é a de XY em c; na cauda, d/dc [-log S] = densidade / S
+    pdf = compute_product_pdf_batch(*cells, n_nodes=n_nodes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return residual, np.where(tail[lanes], pdf / prob, pdf)
+
+
+def solve_product_ppf_batch(muX, sigmaX, muY, sigmaY, p, xtol: float = 1e-8, rtol: float = 1e-6,
+                            tail_p: float = 0.9, n_nodes: int = 128, maxiter: int = MAX_ITER,
+                            surface=None) -> BatchPpfResult:
+    """
+    c com P(XY <= c) = p para arrays de parâmetros (broadcastados entre si), ver o docstring do
+    módulo. Uma faixa converge quando o intervalo ou o último passo fica abaixo de xtol + rtol |c|.
+    surface é uma quantileSurface.QuantileSurface (opcional).
+    """
+    muX, sigmaX, muY, sigmaY, p = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (muX, sigmaX, muY, sigmaY, p))
+    )
+    shape = p.shape
+    muX, sigmaX, muY, sigmaY, p = (a.ravel() for a in (muX, sigmaX, muY, sigmaY, p))
+    n = p.size
+    c = np.full(n, np.nan)
+    iterations = np.zeros(n, dtype=np.int64)
+    converged = np.zeros(n, dtype=bool)
+    tail = (p >= tail_p) & (p < 1.0)
+    args = (muX, sigmaX, muY, sigmaY, p, tail, n_nodes)
+
+    general = (p > 0) & (p < 1)
+    for i in np.flatnonzero(general):
+        closed_form = classify(muX[i], sigmaX[i], muY[i], sigmaY[i])
+        if closed_form is not None:
+            c[i] = closed_form.ppf(p[i])
+            converged[i] = True
+            general[i] = False
+
+    std = np.sqrt(muX**2 * sigmaY**2 + muY**2 * sigmaX**2 + sigmaX**2 * sigmaY**2)
+    guess = muX * muY + std * ndtri(np.where(general, p, 0.5))
+
+    # 0. Quantil tabelado e passos de Newton de polimento
+    if surface is not None:
+        start = surface.quantile(muX, sigmaX, muY, sigmaY, p)
+        lanes = np.flatnonzero(general & np.isfinite(start))
+        x = start[lanes]
+        for _ in range(POLISH_STEPS):
+            if not lanes.size:
+                break
+            r, dr = _residual(lanes, x, *args, slope=True)
+            iterations[lanes] += 1
+            with np.errstate(divide='ignore', invalid='ignore'):
+                new = x - r / np.where(dr > 0, dr, np.nan)
+            valid = np.isfinite(new)
+            done = valid & (np.abs(new - x) <= xtol + rtol * np.abs(x))
+            c[lanes[done]] = new[done]
+            converged[lanes[done]] = True
+            general[lanes[done]] = False
+            keep = valid & ~done
+            guess[lanes[keep]] = new[keep]
+            lanes, x = lanes[keep], new[keep]
+
+    # 1. Intervalo com mudança de sinal, a partir do chute
+    step = BRACKET_N_SIGMAS * std
+    a, b = guess - step, guess + step
+    fa, fb = np.full(n, np.nan), np.full(n, np.nan)
+    lanes = np.flatnonzero(general)
+    if lanes.size:
+        fa[lanes] = _residual(lanes, a[lanes], *args)
+        fb[lanes] = _residual(lanes, b[lanes], *args)
+        iterations[lanes] += 2
+
+    for _ in range(MAX_EXPAND):
+        low = general & (fa > 0)
+        high = general & (fb < 0)
+        if not (low.any() or high.any()):
+            break
+        # Raiz abaixo de a: o novo b é o antigo a; raiz acima de b: o novo a é o antigo b
+        b, fb = np.where(low, a, b), np.where(low, fa, fb)
+        a, fa = np.where(high, b, a), np.where(high, fb, fa)
+        a = np.where(low, a - step, a)
+        b = np.where(high, b + step, b)
+        step = np.where(low | high, 2.0 * step, step)
+        for moved, ends, values in ((low, a, fa), (high, b, fb)):
+            lanes = np.flatnonzero(moved)
+            values[lanes] = _residual(lanes, ends[lanes], *args)
+            iterations[lanes] += 1
+
+    bracketed = general & (fa <= 0) & (fb >= 0)
+    c = np.where(general, guess, c)
+
+    # 2. Illinois nas faixas com intervalo, só nas ainda ativas
+    side = np.zeros(n, dtype=np.int8)
+    previous = np.full(n, np.nan)
+    active = np.flatnonzero(bracketed)
+    for _ in range(maxiter):
+        if not active.size:
+            break
+        a_, b_, fa_, fb_ = a[active], b[active], fa[active], fb[active]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = (a_ * fb_ - b_ * fa_) / (fb_ - fa_)
+        x = np.where((x > a_) & (x < b_), x, 0.5 * (a_ + b_))
+        fx = _residual(active, x, *args)
+        iterations[active] += 1
+        c[active] = x
+
+        left = fx < 0
+        # Ponta que fica parada pela segunda vez seguida tem o resíduo dividido por 2 (Illinois)
+        fa[active] = np.where(left, fx, np.where(side[active] == 1, 0.5 * fa_, fa_))
+        fb[active] = np.where(left, np.where(side[active] == -1, 0.5 * fb_, fb_), fx)
+        a[active] = np.where(left, x, a_)
+        b[active] = np.where(left, b_, x)
+        side[active] = np.where(left, -1, 1)
+
+        tol = xtol + rtol * np.abs(x)
+        done = (fx == 0) | (b[active] - a[active] <= tol) | (np.abs(x - previous[active]) <= tol)
+        previous[active] = x
+        converged[active[done]] = True
+        active = active[~done]
+
+    return BatchPpfResult(c.reshape(shape), iterations.reshape(shape), converged.reshape(shape))
@@ -0,0 +1,556 @@
+"""
+Benchmarks dos motores de cálculo.
+
+Uso: python benchmark.py [nome ...]   (sem argumentos roda todos)
+"""
+import sys
+import time
+import numpy as np
+from prodOfTwoVariables import ProdOfNormalRVs
+from inverseProdOfTwoVariables import InverseProdOfTwoVariables
+from numbaIntegrand import integrand_llc
+from saddlepointProd import saddlepoint_cdf, saddlepoint_ppf
+from monteCarlo import ESTIMATORS, reduced_variance_product_mc
+from cdfCurve import ProductCdfCurve
+from cdfGradient import quantile_gradient
+from cosProd import CosSeries
+from precisionProfiles import PROFILES
+from quantileSurface import get_surface
+from cdfCache import CDF_CACHE
+
+# Os benchmarks medem o custo das integrais: o cache só fica ligado em bench_cache
+CDF_CACHE.enabled = False
+
+# (muX, sigmaX, muY, sigmaY, c) no formato das células da planilha
+CELULAS = [
+    (112461.03097441, 110687.75, 4.237, 0.1545, 17677.2351),
+    (818.58, 655.8325, 21.595, 0.7884, 20000.0),
+    (70.27, 40.77, 13.11, 0.4786, 1591.3746),
+    (195.14972416, 112.4037, 9.45, 0.3449, 3000.0),
+    (-73.1, 13.9696, 9.45, 0.3449, -500.0),
+    (7365.65598756, 4277.77, 4.889, 0.1783, 3531.34484999),
+    (503.65, 85.8234, 4.889, 0.1783, 3531.34484999),
+    (467.0483, 278.6301, 18.26, 0.6667, 15000.0),
+]
+
+# Células sintéticas com os dois fatores de CV alto (massa perto de zero), onde os perfis se separam
+CELULAS_CV_ALTO = [
+    (1.0, 2.0, 3.0, 4.0, 0.5),
+    (0.1, 1.0, 0.1, 1.0, -0.3),
+    (5.0, 5.0, 1.0, 1.0, 2.0),
+    (1.0, 1.5, -2.0, 3.0, -1.0),
+    (10.0, 8.0, 4.0, 3.0, 30.0),
+    (0.5, 1.0, 0.5, 1.0, 0.0),
+]
+
+PLANILHA = "Stock_Data_in_days_cv_02_5V.xlsx"
+PAGINA = "Main_variables"
+
+
+def _celulas_planilha(limite: int = 24) -> list:
+    """Células (mux2, sigmax2, muy, sigmay, reorder) não degeneradas da planilha, amostradas em passo fixo"""
+    from Tabela import Tabela
+    from Particoes_na_tabela import SUPLIERS_POSICOES, FACTORS_POSICOES, DISTRIBUTORS_POSICOES, RETAILERS_POSICOES
+
+    tabela = Tabela()
+    tabela.carregarArquivoParaRam(PLANILHA)
+    celulas = []
+    for particao in (SUPLIERS_POSICOES, FACTORS_POSICOES, DISTRIBUTORS_POSICOES, RETAILERS_POSICOES):
+        for j in range(9):
+            for p in tabela.carregarMatriz(particao, PAGINA, tabela=j, coluna_inicio=26):
+                cel = tuple(float(v) for v in (p.mux2, p.sigmax2, p.muy, p.sigmay, p.reorder))
+                if cel[1] > 0 and cel[3] > 0 and cel[4] != 0 and cel not in celulas:
+                    celulas.append(cel)
+    tabela.removerArquivoDaRam()
+    passo = max(len(celulas) // limite, 1)
+    return celulas[::passo][:limite]
+
+
+def _cronometra(func, repeticoes: int = 3) -> float:
+    """Menor tempo (s) entre as repetições"""
+    melhor = np.inf
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def bench_numba():
+    """Custo por célula do quad com integrando Python vs. LowLevelCallable numba"""
+    print("\n## Integrando numba (LowLevelCallable) vs. Python")
+    if integrand_llc is None:
+        print("numba não disponível, nada a comparar.")
+        return
+
+    print(f"{'célula':>8} {'cdf py (ms)':>12} {'cdf numba':>10} {'x':>6} {'inv py (ms)':>12} {'inv numba':>10} {'x':>6} {'|dif|':>9}")
+    for i, (muX, sigmaX, muY, sigmaY, c) in enumerate(CELULAS):
+        tempos = {}
+        valores = {}
+        for flag in (False, True):
+            ProdOfNormalRVs.use_numba = flag
+            InverseProdOfTwoVariables.use_numba = flag
+            tempos['cdf', flag] = _cronometra(lambda: ProdOfNormalRVs(muX, sigmaX, muY, sigmaY, c).compute_product_cdf_1d(c))
+            tempos['inv', flag] = _cronometra(
+                lambda: InverseProdOfTwoVariables._compute_product_cdf_1d(c, muX, sigmaX, muY, sigmaY))
+            valores[flag] = ProdOfNormalRVs(muX, sigmaX, muY, sigmaY, c).compute_product_cdf_1d(c)
+
+        print(f"{i:>8} {tempos['cdf', False]*1e3:>12.3f} {tempos['cdf', True]*1e3:>10.3f} "
+              f"{tempos['cdf', False]/tempos['cdf', True]:>6.1f} "
+              f"{tempos['inv', False]*1e3:>12.3f} {tempos['inv', True]*1e3:>10.3f} "
+              f"{tempos['inv', False]/tempos['inv', True]:>6.1f} {abs(valores[True] - valores[False]):>9.1e}")
+
+    ProdOfNormalRVs.use_numba = integrand_llc is not None
+    InverseProdOfTwoVariables.use_numba = integrand_llc is not None
+
+
+def bench_saddlepoint():
+    """Ponto de sela vs. quad: custo, erro real e erro estimado por célula"""
+    print("\n## Ponto de sela (Lugannani-Rice) vs. quad")
+    print(f"{'célula':>8} {'quad (ms)':>10} {'sela (us)':>10} {'|erro|':>9} {'estimado':>9} "
+          f"{'inv quad (ms)':>14} {'inv sela (us)':>14} {'|dp|':>9}")
+    for i, (muX, sigmaX, muY, sigmaY, c) in enumerate(CELULAS):
+        analyzer = ProdOfNormalRVs(muX, sigmaX, muY, sigmaY, c)
+        t_quad = _cronometra(lambda: analyzer.compute_product_cdf_1d(c))
+        t_sela = _cronometra(lambda: saddlepoint_cdf(c, muX, sigmaX, muY, sigmaY))
+        approx, approx_err = saddlepoint_cdf(c, muX, sigmaX, muY, sigmaY)
+
+        solver = InverseProdOfTwoVariables(muX, sigmaX, muY, sigmaY)
+        t_inv_quad = _cronometra(lambda: solver.solve_inverse_cdf(n_samples=1), repeticoes=1)
+        t_inv_sela = _cronometra(lambda: saddlepoint_ppf(solver.target_p, muX, sigmaX, muY, sigmaY))
+        c_sela, _ = saddlepoint_ppf(solver.target_p, muX, sigmaX, muY, sigmaY)
+        dp = InverseProdOfTwoVariables._compute_product_cdf_1d(c_sela, muX, sigmaX, muY, sigmaY) - solver.target_p
+
+        print(f"{i:>8} {t_quad*1e3:>10.3f} {t_sela*1e6:>10.1f} {abs(approx - analyzer.numerical_result):>9.1e} "
+              f"{approx_err:>9.1e} {t_inv_quad*1e3:>14.3f} {t_inv_sela*1e6:>14.1f} {abs(dp):>9.1e}")
+
+
+def bench_estimators(n_samples: int = 1 << 16, repeticoes: int = 10):
+    """
+    Fator de redução de variância por estimador, em células reais da planilha:
+    p(1-p)/n (amostras simples) dividido pela variância observada entre repetições.
+    """
+    print(f"\n## Estimadores Monte Carlo ({n_samples} amostras, {repeticoes} repetições por célula)")
+    celulas = _celulas_planilha()
+    fatores = {e: [] for e in ESTIMATORS}
+    print(f"{'célula':>8} {'p':>9} " + " ".join(f"{e:>11}" for e in ESTIMATORS))
+    for i, (muX, sigmaX, muY, sigmaY, c) in enumerate(celulas):
+        p = InverseProdOfTwoVariables._compute_product_cdf_1d(c, muX, sigmaX, muY, sigmaY)
+        var_simples = p * (1 - p) / n_samples
+        if var_simples == 0:
+            continue  # P(XY <= c) em 0 ou 1: nada a reduzir
+        linha = []
+        for e in ESTIMATORS:
+            estimativas = [reduced_variance_product_mc(muX, sigmaX, muY, sigmaY, c, estimator=e, n_samples=n_samples).prob
+                           for _ in range(repeticoes)]
+            var = np.var(estimativas, ddof=1)
+            fator = var_simples / var if var > 0 else np.inf
+            fatores[e].append(fator)
+            linha.append(f"{fator:>11.1f}")
+        print(f"{i:>8} {p:>9.6f} " + " ".join(linha))
+
+    print(f"{'mediana':>18} " + " ".join(f"{np.median(fatores[e]):>11.1f}" for e in ESTIMATORS))
+    print(f"{'amostras ~ 1M simples':>18} " + " ".join(f"{1e6 / np.median(fatores[e]):>11.0f}" for e in ESTIMATORS))
+
+
+def bench_curve(n_pontos: int = 200):
+    """Curva de CDF como no plot_cdfs: n_pontos integrais separadas (Python e numba) vs. uma tabulação"""
+    print(f"\n## Curva de CDF ({n_pontos} limiares)")
+    print(f"{'célula':>8} {'quad py (ms)':>13} {'quad numba':>11} {'curva (ms)':>11} {'máx |dif|':>10}")
+    for i, (muX, sigmaX, muY, sigmaY, c) in enumerate(CELULAS):
+        analyzer = ProdOfNormalRVs(muX, sigmaX, muY, sigmaY, c)
+        z = np.linspace(analyzer.theoretical_mean - 4 * analyzer.theoretical_std,
+                        analyzer.theoretical_mean + 4 * analyzer.theoretical_std, n_pontos)
+        tempos = {}
+        for flag in (False, True):
+            ProdOfNormalRVs.use_numba = flag
+            tempos[flag] = _cronometra(lambda: [analyzer.compute_product_cdf_1d(zi) for zi in z], repeticoes=1)
+        ProdOfNormalRVs.use_numba = integrand_llc is not None
+        t_curva = _cronometra(lambda: ProductCdfCurve(muX, sigmaX, muY, sigmaY)(z))
+        # Contra o valor sem o arredondamento da 6a casa do compute_product_cdf_1d; medido: ~1.4e-9 nas
+        # células de CELULAS e até ~1.5e-6 nas de CELULAS_CV_ALTO
+        ref = []
+        for zi in z:
+            analyzer.compute_product_cdf_1d(zi)
+            ref.append(analyzer.numerical_result)
+        dif = np.max(np.abs(ProductCdfCurve(muX, sigmaX, muY, sigmaY)(z) - ref))
+        print(f"{i:>8} {tempos[False]*1e3:>13.1f} {tempos[True]*1e3:>11.1f} {t_curva*1e3:>11.1f} {dif:>10.1e}")
+
+
+def bench_kde(n_amostras: int = 1_000_000, n_pontos: int = 200, n_ref: int = 100_000):
+    """PDF empírica do plot_cdfs: gaussian_kde vs. KDE binado (amostra inteira e sketch do Monte Carlo)"""
+    from scipy.stats import gaussian_kde
+    from binnedKde import BinnedKde
+    from empiricalDist import HistogramSketch
+
+    print(f"\n## KDE ({n_amostras} amostras, {n_pontos} pontos; gaussian_kde medido com {n_ref} e extrapolado)")
+    print(f"{'célula':>8} {'gaussian_kde (s)':>17} {'binado (ms)':>12} {'sketch (ms)':>12} {'dif. rel.':>10}")
+    rng = np.random.default_rng(0)
+    for i, (muX, sigmaX, muY, sigmaY, c) in enumerate(CELULAS):
+        z = (muX + sigmaX * rng.standard_normal(n_amostras)) * (muY + sigmaY * rng.standard_normal(n_amostras))
+        pontos = np.linspace(*np.percentile(z, [0.5, 99.5]), n_pontos)
+        # Custo do gaussian_kde é linear em n: mede numa parte da amostra
+        t_ref = _cronometra(lambda: gaussian_kde(z[:n_ref])(pontos), repeticoes=1) * n_amostras / n_ref
+        t_bin = _cronometra(lambda: BinnedKde(z)(pontos))
+        sketch = HistogramSketch.around(z.mean(), z.std())
+        sketch.update(z)
+        t_sketch = _cronometra(lambda: BinnedKde.from_sketch(sketch)(pontos))
+        ref = gaussian_kde(z[:n_ref])(pontos)
+        dif = np.max(np.abs(BinnedKde(z[:n_ref])(pontos) - ref)) / ref.max()
+        print(f"{i:>8} {t_ref:>17.2f} {t_bin*1e3:>12.1f} {t_sketch*1e3:>12.1f} {dif:>10.1e}")
+
+
+def bench_quad_evals():
+    """Chamadas do integrando (Python) por célula no quad de cada classe e erro contra o motor vetorizado"""
+    from batchProdCdf import compute_product_cdf_batch
+
+    print("\n## Avaliações do integrando por célula (quad)")
+    print(f"{'célula':>8} {'cdf evals':>10} {'cdf (ms)':>9} {'|erro|':>9} {'inv evals':>10} {'inv (ms)':>9} {'|erro|':>9}")
+    originais = (ProdOfNormalRVs._integrand, InverseProdOfTwoVariables._integrand)
+    contador = [0]
+
+    def conta(func):
+        def wrapper(*args):
+            contador[0] += 1
+            return func(*args)
+        return wrapper
+
+    ProdOfNormalRVs.use_numba = InverseProdOfTwoVariables.use_numba = False
+    ProdOfNormalRVs._integrand = staticmethod(conta(originais[0]))
+    InverseProdOfTwoVariables._integrand = staticmethod(conta(originais[1]))
+    totais = [0, 0]
+    try:
+        for i, (muX, sigmaX, muY, sigmaY, c) in enumerate(CELULAS + _celulas_planilha()):
+            ref = float(compute_product_cdf_batch(muX, sigmaX, muY, sigmaY, c, n_nodes=256))
+            analyzer = ProdOfNormalRVs(muX, sigmaX, muY, sigmaY, c)
+            contador[0] = 0
+            analyzer.compute_product_cdf_1d(c)
+            n_cdf = contador[0]
+            t_cdf = _cronometra(lambda: analyzer.compute_product_cdf_1d(c))
+            contador[0] = 0
+            p_inv = InverseProdOfTwoVariables._compute_product_cdf_1d(c, muX, sigmaX, muY, sigmaY)
+            n_inv = contador[0]
+            t_inv = _cronometra(lambda: InverseProdOfTwoVariables._compute_product_cdf_1d(c, muX, sigmaX, muY, sigmaY))
+            totais[0] += n_cdf
+            totais[1] += n_inv
+            print(f"{i:>8} {n_cdf:>10} {t_cdf*1e3:>9.2f} {abs(analyzer.numerical_result - ref):>9.1e} "
+                  f"{n_inv:>10} {t_inv*1e3:>9.2f} {abs(p_inv - ref):>9.1e}")
+    finally:
+        ProdOfNormalRVs._integrand = staticmethod(originais[0])
+        InverseProdOfTwoVariables._integrand = staticmethod(originais[1])
+        ProdOfNormalRVs.use_numba = InverseProdOfTwoVariables.use_numba = integrand_llc is not None
+    print(f"{'total':>8} {totais[0]:>10} {'':>9} {'':>9} {totais[1]:>10}")
+
+
+def bench_tail(alvos=(0.98, 0.999, 1 - 1e-5, 1 - 1e-7, 1 - 1e-9)):
+    """Inversa em níveis de serviço altos: integrais por célula e erro relativo em 1 - p, CDF direta vs. log da cauda"""
+    print("\n## Inversa na cauda (soma nas células de CELULAS)")
+    print(f"{'alvo':>12} {'avals F-p':>10} {'máx erro rel':>13} {'avals log':>10} {'máx erro rel':>13}")
+    original = InverseProdOfTwoVariables._integrate_cdf
+    contador = [0]
+
+    def conta(func):
+        def wrapper(*args):
+            contador[0] += 1
+            return func(*args)
+        return staticmethod(wrapper)
+
+    InverseProdOfTwoVariables._integrate_cdf = conta(original)
+    try:
+        for p in alvos:
+            linha = f"{p:>12.9f}"
+            for tail_p in (1.0, InverseProdOfTwoVariables.tail_p):
+                avals, erro = 0, 0.0
+                for muX, sigmaX, muY, sigmaY, _ in CELULAS:
+                    solver = InverseProdOfTwoVariables(muX, sigmaX, muY, sigmaY, target_p=p)
+                    solver.tail_p = tail_p
+                    contador[0] = 0
+                    solver.solve_inverse_cdf(n_samples=1)
+                    avals += contador[0]
+                    cauda = InverseProdOfTwoVariables._compute_product_sf_1d(solver.c_solution, muX, sigmaX, muY, sigmaY)
+                    erro = max(erro, abs(cauda / (1 - p) - 1))
+                linha += f" {avals:>10} {erro:>13.1e}"
+            print(linha)
+    finally:
+        InverseProdOfTwoVariables._integrate_cdf = staticmethod(original)
+
+
+def bench_gradient(alvo: float = 0.98, passo_rel: float = 1e-6):
+    """Sensibilidades da inversa: teorema da função implícita vs. diferenças centrais (8 brentq por célula)"""
+    print(f"\n## Sensibilidades de c em muX, sigmaX, muY, sigmaY (alvo {alvo})")
+    print(f"{'célula':>6} {'t TFI (ms)':>11} {'t dif. (ms)':>12} {'máx dif. rel':>13}")
+
+    def resolve(*params):
+        solver = InverseProdOfTwoVariables(*params, target_p=alvo)
+        solver.solve_inverse_cdf(n_samples=1)
+        return solver.c_solution
+
+    nomes = ("muX", "sigmaX", "muY", "sigmaY")
+    for i, (muX, sigmaX, muY, sigmaY, _) in enumerate(CELULAS):
+        params = (muX, sigmaX, muY, sigmaY)
+        c = resolve(*params)
+        t_tfi = _cronometra(lambda: quantile_gradient(c, *params))
+        tfi = quantile_gradient(c, *params)
+
+        def diferencas():
+            derivadas = {}
+            for k, nome in enumerate(nomes):
+                h = passo_rel * abs(params[k])
+                mais, menos = list(params), list(params)
+                mais[k] += h
+                menos[k] -= h
+                derivadas[nome] = (resolve(*mais) - resolve(*menos)) / (2 * h)
+            return derivadas
+
+        t_dif = _cronometra(diferencas, repeticoes=1)
+        dif = diferencas()
+        erro = max(abs(tfi[n] - dif[n]) / max(abs(dif[n]), 1e-300) for n in nomes)
+        print(f"{i:>6} {t_tfi * 1e3:>11.2f} {t_dif * 1e3:>12.1f} {erro:>13.1e}")
+
+
+def bench_cos(alvo: float = 0.98, n_termos=(128, 256, 512)):
+    """Motor COS vetorizado nas células vs. quad (CDF) e brentq (inversa) célula a célula"""
+    celulas = CELULAS + _celulas_planilha()
+    muX, sigmaX, muY, sigmaY, c = (np.array(v) for v in zip(*celulas))
+    print(f"\n## Motor COS ({len(celulas)} células, alvo {alvo})")
+
+    ref_cdf = np.array([InverseProdOfTwoVariables._compute_product_cdf_refined(*cel[4:], *cel[:4], lambda v, e: False)[0]
+                        for cel in celulas])
+    t_quad = _cronometra(lambda: [ProdOfNormalRVs(*cel[:4], c=cel[4]).compute_product_cdf_1d(cel[4]) for cel in celulas])
+
+    def resolve():
+        solvers = [InverseProdOfTwoVariables(*cel[:4], target_p=alvo) for cel in celulas]
+        for solver in solvers:
+            solver.solve_inverse_cdf(n_samples=1)
+        return np.array([solver.c_solution for solver in solvers])
+
+    t_brentq = _cronometra(resolve, repeticoes=1)
+    ref_c = resolve()
+    erro_brentq = max(abs(InverseProdOfTwoVariables._compute_product_cdf_refined(x, *cel[:4], lambda v, e: False)[0] - alvo)
+                      for x, cel in zip(ref_c, celulas))
+
+    print(f"{'motor':>10} {'t CDF (ms)':>11} {'máx |dF|':>10} {'máx erro est.':>14} {'t inversa (ms)':>15} {'máx |F(c) - p|':>15}")
+    print(f"{'quad':>10} {t_quad * 1e3:>11.2f} {'-':>10} {'-':>14} {t_brentq * 1e3:>15.2f} {erro_brentq:>15.1e}")
+    for n in n_termos:
+        t_cdf = _cronometra(lambda: CosSeries(muX, sigmaX, muY, sigmaY, n_terms=n).cdf_with_error(c))
+        F, erro_est = CosSeries(muX, sigmaX, muY, sigmaY, n_terms=n).cdf_with_error(c)
+        t_inv = _cronometra(lambda: CosSeries(muX, sigmaX, muY, sigmaY, n_terms=n).ppf(np.full(c.shape, alvo)))
+        q = CosSeries(muX, sigmaX, muY, sigmaY, n_terms=n).ppf(np.full(c.shape, alvo))
+        erro_inv = max(abs(InverseProdOfTwoVariables._compute_product_cdf_refined(x, *cel[:4], lambda v, e: False)[0] - alvo)
+                       for x, cel in zip(q, celulas))
+        print(f"{'cos ' + str(n):>10} {t_cdf * 1e3:>11.2f} {np.max(np.abs(F - ref_cdf)):>10.1e} {np.max(erro_est):>14.1e} "
+              f"{t_inv * 1e3:>15.2f} {erro_inv:>15.1e}")
+
+
+def bench_profiles(alvo: float = 0.98):
+    """Custo e erro de cada perfil de precisão (CDF sem arredondar e inversa), contra o perfil reference"""
+
+    def cdfs(celulas, perfil):
+        valores = []
+        for muX, sigmaX, muY, sigmaY, c in celulas:
+            analyzer = ProdOfNormalRVs(muX, sigmaX, muY, sigmaY, c=c, profile=perfil)
+            analyzer.compute_product_cdf_1d(c)
+            valores.append(analyzer.numerical_result)
+        return np.array(valores)
+
+    def inversas(celulas, perfil):
+        valores = []
+        for muX, sigmaX, muY, sigmaY, _ in celulas:
+            solver = InverseProdOfTwoVariables(muX, sigmaX, muY, sigmaY, target_p=alvo, profile=perfil)
+            solver.solve_inverse_cdf(n_samples=1)
+            valores.append(solver.c_solution)
+        return np.array(valores)
+
+    for titulo, celulas in (("benchmark e planilha", CELULAS + _celulas_planilha()), ("CV alto", CELULAS_CV_ALTO)):
+        print(f"\n## Perfis de precisão: {titulo} ({len(celulas)} células, alvo {alvo})")
+        print(f"{'perfil':>10} {'CDF ms/cél':>11} {'máx |dF|':>10} {'inv ms/cél':>11} {'máx |dc|/c':>11}")
+        ref_F, ref_c = cdfs(celulas, "reference"), inversas(celulas, "reference")
+        for nome in PROFILES:
+            t_cdf = _cronometra(lambda: cdfs(celulas, nome)) / len(celulas)
+            t_inv = _cronometra(lambda: inversas(celulas, nome)) / len(celulas)
+            erro_F = np.max(np.abs(cdfs(celulas, nome) - ref_F))
+            erro_c = np.max(np.abs(inversas(celulas, nome) - ref_c) / np.abs(ref_c))
+            print(f"{nome:>10} {t_cdf * 1e3:>11.3f} {erro_F:>10.1e} {t_inv * 1e3:>11.3f} {erro_c:>11.1e}")
+
+
+def bench_newton(alvos=(0.5, 0.98, 0.999, 1 - 1e-9)):
+    """Inversa por Newton/Halley (pares CDF + densidade) vs. duplicação + brentq: avaliações, integrais e erro"""
+    celulas = CELULAS + _celulas_planilha() + CELULAS_CV_ALTO
+    print(f"\n## Newton/Halley vs. brentq ({len(celulas)} células; integrais = quad da CDF + quad da densidade)")
+    print(f"{'alvo':>12} {'método':>7} {'ms/cél':>7} {'integrais/cél':>14} {'avals méd':>10} {'avals máx':>10} "
+          f"{'máx |dc|/c':>11}")
+    original_cdf = InverseProdOfTwoVariables._integrate_cdf
+    original_pdf = InverseProdOfTwoVariables._compute_product_pdf
+    contador = [0]
+
+    def conta(func, peso):
+        def wrapper(*args):
+            contador[0] += peso(args)
+            return func(*args)
+        return staticmethod(wrapper)
+
+    def resolve(p, newton, perfil="standard"):
+        InverseProdOfTwoVariables.use_newton = newton
+        solucoes, iteracoes = [], []
+        for muX, sigmaX, muY, sigmaY, _ in celulas:
+            solver = InverseProdOfTwoVariables(muX, sigmaX, muY, sigmaY, target_p=p, profile=perfil)
+            solver.solve_inverse_cdf(n_samples=1)
+            solucoes.append(solver.c_solution)
+            iteracoes.append(solver.solution_iterations or 0)
+        return np.array(solucoes), np.array(iteracoes)
+
+    try:
+        for p in alvos:
+            ref, _ = resolve(p, False, "reference")
+            for metodo, newton in (("brentq", False), ("halley", True)):
+                tempo = _cronometra(lambda: resolve(p, newton)) / len(celulas)
+                InverseProdOfTwoVariables._integrate_cdf = conta(original_cdf, lambda args: 1)
+                InverseProdOfTwoVariables._compute_product_pdf = conta(original_pdf, lambda args: len(args[5]))
+                contador[0] = 0
+                solucoes, iteracoes = resolve(p, newton)
+                InverseProdOfTwoVariables._integrate_cdf = staticmethod(original_cdf)
+                InverseProdOfTwoVariables._compute_product_pdf = staticmethod(original_pdf)
+                erro = np.max(np.abs(solucoes - ref) / np.abs(ref))
+                avals = (f"{iteracoes.mean():>10.2f} {iteracoes.max():>10}" if newton else f"{'-':>10} {'-':>10}")
+                print(f"{p:>12.9f} {metodo:>7} {tempo * 1e3:>7.2f} {contador[0] / len(celulas):>14.1f} {avals} "
+                      f"{erro:>11.1e}")
+    finally:
+        InverseProdOfTwoVariables._integrate_cdf = staticmethod(original_cdf)
+        InverseProdOfTwoVariables._compute_product_pdf = staticmethod(original_pdf)
+        InverseProdOfTwoVariables.use_newton = True
+
+
+def bench_batch_inverse(alvos=(0.98, 0.999, 1 - 1e-9), n_celulas: int = 570):
+    """Inversa de uma partição inteira (190 x 3 células): um solve escalar por célula vs. o lote vetorizado"""
+    base = CELULAS + _celulas_planilha() + CELULAS_CV_ALTO
+    celulas = np.array([base[i % len(base)][:4] for i in range(n_celulas)])
+    print(f"\n## Inversa em lote ({n_celulas} células, {len(base)} distintas)")
+    print(f"{'alvo':>12} {'escalar ms':>11} {'lote ms':>8} {'máx |dc|/c':>11} {'avals méd':>10} {'avals máx':>10} "
+          f"{'convergidas':>12}")
+    for p in alvos:
+        def escalar():
+            solucoes = []
+            for muX, sigmaX, muY, sigmaY in celulas[:len(base)]:
+                solver = InverseProdOfTwoVariables(muX, sigmaX, muY, sigmaY, target_p=p)
+                solver.solve_inverse_cdf(n_samples=1)
+                solucoes.append(solver.c_solution)
+            return np.array(solucoes)
+
+        # O escalar roda só nas células distintas e é escalado para n_celulas
+        t_escalar = _cronometra(escalar, repeticoes=1) * n_celulas / len(base)
+        t_lote = _cronometra(lambda: InverseProdOfTwoVariables.solve_inverse_cdf_batch(*celulas.T, target_p=p))
+        lote = InverseProdOfTwoVariables.solve_inverse_cdf_batch(*celulas.T, target_p=p)
+        erro = np.max(np.abs(lote.c[:len(base)] - escalar()) / np.abs(lote.c[:len(base)]))
+        print(f"{p:>12.9f} {t_escalar * 1e3:>11.1f} {t_lote * 1e3:>8.1f} {erro:>11.1e} "
+              f"{lote.iterations.mean():>10.2f} {lote.iterations.max():>10} {int(lote.converged.sum()):>12}")
+
+
+def bench_surface(alvos=(0.5, 0.98, 0.999, 1 - 1e-9), n_celulas: int = 570):
+    """Superfície de quantis: erro da interpolação e inversa (escalar e em lote) com e sem ela"""
+    superficie = get_surface()
+    if superficie is None:
+        print("\n## Superfície de quantis: arquivo ausente, gere com python quantileSurface.py")
+        return
+    base = CELULAS + _celulas_planilha() + CELULAS_CV_ALTO
+    celulas = np.array([base[i % len(base)][:4] for i in range(n_celulas)])
+    print(f"\n## Superfície de quantis ({len(base)} células distintas; lote com {n_celulas})")
+    print(f"{'alvo':>12} {'cobertas':>9} {'máx |dc|/std':>13} {'superfície':>11} {'esc. ms':>8} {'avals':>6} "
+          f"{'lote ms':>8} {'avals':>6}")
+
+    def escalar(p):
+        iteracoes = []
+        for muX, sigmaX, muY, sigmaY, _ in base:
+            solver = InverseProdOfTwoVariables(muX, sigmaX, muY, sigmaY, target_p=p)
+            solver.solve_inverse_cdf(n_samples=1)
+            iteracoes.append(solver.solution_iterations or 0)
+        return np.mean(iteracoes)
+
+    try:
+        for p in alvos:
+            InverseProdOfTwoVariables.use_surface = False
+            ref = InverseProdOfTwoVariables.solve_inverse_cdf_batch(*celulas.T, target_p=p, n_nodes=256).c
+            tabela = superficie.quantile(*celulas.T, p)
+            cobertas = np.isfinite(tabela)
+            std = np.sqrt(celulas[:, 0]**2 * celulas[:, 3]**2 + celulas[:, 2]**2 * celulas[:, 1]**2
+                          + celulas[:, 1]**2 * celulas[:, 3]**2)
+            erro = np.max(np.abs(tabela - ref)[cobertas] / std[cobertas])
+            for usa in (False, True):
+                InverseProdOfTwoVariables.use_surface = usa
+                t_escalar = _cronometra(lambda: escalar(p)) / len(base)
+                t_lote = _cronometra(lambda: InverseProdOfTwoVariables.solve_inverse_cdf_batch(*celulas.T, target_p=p))
+                lote = InverseProdOfTwoVariables.solve_inverse_cdf_batch(*celulas.T, target_p=p)
+                print(f"{p:>12.9f} {int(cobertas.sum()):>9} {erro:>13.1e} {'sim' if usa else 'não':>11} "
+                      f"{t_escalar * 1e3:>8.2f} {escalar(p):>6.2f} {t_lote * 1e3:>8.1f} "
+                      f"{lote.iterations.mean():>6.2f}")
+    finally:
+        InverseProdOfTwoVariables.use_surface = True
+
+
+def bench_cache(alvo: float = 0.98):
+    """Fluxos que repetem integrais, com e sem CDF_CACHE (frio a cada repetição): tempo, acertos e faltas"""
+    celulas = CELULAS + _celulas_planilha()
+    print(f"\n## Cache de integrais ({len(celulas)} células; inversa em p = {alvo})")
+    print(f"{'fluxo':>16} {'ms sem':>8} {'ms com':>8} {'acertos':>8} {'faltas':>7} {'taxa':>6} {'iguais':>7}")
+
+    def cdf_duas_vezes():
+        # solve_cdf e depois plot_cdfs, cada um com a sua chamada de compute_product_cdf_1d
+        return [ProdOfNormalRVs(muX, sigmaX, muY, sigmaY, c).compute_product_cdf_1d(c)
+                for muX, sigmaX, muY, sigmaY, c in celulas for _ in range(2)]
+
+    def inversa(newton, confere=False):
+        def fluxo():
+            InverseProdOfTwoVariables.use_newton = newton
+            saida = []
+            for muX, sigmaX, muY, sigmaY, _ in celulas:
+                solver = InverseProdOfTwoVariables(muX, sigmaX, muY, sigmaY, target_p=alvo)
+                c = solver.solve_inverse_cdf(n_samples=1)
+                saida.append(c)
+                if confere:
+                    saida.append(ProdOfNormalRVs(muX, sigmaX, muY, sigmaY, c).compute_product_cdf_1d(c))
+            return saida
+        return fluxo
+
+    fluxos = {
+        "cdf + gráfico": cdf_duas_vezes,
+        "brentq": inversa(False),
+        "halley": inversa(True),
+        "halley + cdf": inversa(True, confere=True),
+    }
+    try:
+        for nome, fluxo in fluxos.items():
+            CDF_CACHE.enabled = False
+            t_sem = _cronometra(fluxo)
+            sem = fluxo()
+            CDF_CACHE.enabled = True
+            t_com = _cronometra(lambda: (CDF_CACHE.clear(), fluxo()))
+            CDF_CACHE.clear()
+            com = fluxo()
+            print(f"{nome:>16} {t_sem * 1e3:>8.1f} {t_com * 1e3:>8.1f} {CDF_CACHE.hits:>8} {CDF_CACHE.misses:>7} "
+                  f"{CDF_CACHE.hit_rate:>6.1%} {'sim' if sem == com else 'não':>7}")
+    finally:
+        CDF_CACHE.enabled = False
+        CDF_CACHE.clear()
+        InverseProdOfTwoVariables.use_newton = True
+
+
+BENCHMARKS = {
+    "numba": bench_numba,
+    "saddlepoint": bench_saddlepoint,
+    "estimators": bench_estimators,
+    "curve": bench_curve,
+    "kde": bench_kde,
+    "quad_evals": bench_quad_evals,
+    "tail": bench_tail,
+    "gradient": bench_gradient,
+    "cos": bench_cos,
+    "profiles": bench_profiles,
+    "newton": bench_newton,
+    "batch_inverse": bench_batch_inverse,
+    "surface": bench_surface,
+    "cache": bench_cache,
+}
+
+if __name__ == "__main__":
+    nomes = sys.argv[1:] or list(BENCHMARKS)
+    for nome in nomes:
+        BENCHMARKS[nome]()
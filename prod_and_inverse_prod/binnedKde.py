@@ -0,0 +1,104 @@
+"""
+Estimativa de densidade por núcleo gaussiano, binada, para as amostras de Z = XY.
+
+gaussian_kde soma um núcleo por amostra em cada ponto avaliado (n * m
+avaliações). Aqui as amostras são distribuídas por binagem linear numa grade
+uniforme de grid_size pontos e a grade é convoluída com o núcleo por FFT:
+O(n + m log m), e depois qualquer número de pontos sai por interpolação.
+
+As regras de largura de banda são as mesmas do gaussian_kde ('scott',
+'silverman', escalar ou função que recebe o estimador), com o mesmo neff e a
+mesma covariância não viesada, então as duas curvas coincidem a menos do erro
+de binagem.
+"""
+import numpy as np
+from scipy.signal import fftconvolve
+
+DEFAULT_GRID_SIZE = 1 << 14
+# O núcleo é truncado (e a grade estendida além dos dados) em KERNEL_N_SIGMAS larguras de banda
+KERNEL_N_SIGMAS = 8.0
+
+
+class BinnedKde:
+    """Interface próxima da de gaussian_kde em uma dimensão: evaluate, pdf, __call__, factor, neff"""
+
+    d = 1
+
+    def __init__(self, dataset, bw_method=None, weights=None, grid_size: int = DEFAULT_GRID_SIZE):
+        z = np.asarray(dataset, dtype=np.float64).ravel()
+        if weights is None:
+            w = np.full(z.size, 1.0 / z.size)
+        else:
+            w = np.asarray(weights, dtype=np.float64).ravel()
+            w = w / w.sum()
+        self._fit(z, w, 1.0 / np.sum(w**2), bw_method, grid_size)
+
+    @classmethod
+    def from_sketch(cls, sketch, bw_method=None, grid_size: int = DEFAULT_GRID_SIZE) -> "BinnedKde":
+        """
+        KDE a partir das contagens de um HistogramSketch (Monte Carlo em blocos, sem Z
+        guardado). Cada bin vale como suas amostras no centro; a massa fora da faixa do
+        sketch fica de fora, mas entra na normalização.
+        """
+        counts = sketch.counts[1:-1].astype(np.float64)
+        centers = sketch.lo + sketch.width * (np.arange(sketch.n_bins) + 0.5)
+        kde = cls.__new__(cls)
+        keep = counts > 0
+        kde._fit(centers[keep], counts[keep] / sketch.n, float(sketch.n), bw_method, grid_size)
+        return kde
+
+    def _fit(self, z: np.ndarray, w: np.ndarray, neff: float, bw_method, grid_size: int):
+        """w soma 1 (ou menos, se parte da massa não foi vista); neff é o tamanho efetivo da amostra"""
+        self.n = z.size
+        self.neff = neff
+        self.factor = self._bandwidth_factor(bw_method)
+
+        # Covariância como em np.cov(..., aweights=w): divide por sum(w) (1 - 1/neff)
+        mass = w.sum()
+        mean = np.dot(w, z) / mass
+        self.data_std = np.sqrt(np.dot(w, (z - mean)**2) / (mass * (1.0 - 1.0 / neff)))
+        self.bandwidth = self.factor * self.data_std
+        if not self.bandwidth > 0:
+            raise ValueError("Amostra sem dispersão: a largura de banda do KDE é zero")
+
+        pad = KERNEL_N_SIGMAS * self.bandwidth
+        self.grid = np.linspace(z.min() - pad, z.max() + pad, grid_size)
+        dx = self.grid[1] - self.grid[0]
+
+        # Binagem linear: cada amostra divide seu peso entre os dois nós vizinhos
+        pos = (z - self.grid[0]) / dx
+        i = np.minimum(pos.astype(np.int64), grid_size - 2)
+        frac = pos - i
+        binned = (np.bincount(i, weights=w * (1.0 - frac), minlength=grid_size)
+                  + np.bincount(i + 1, weights=w * frac, minlength=grid_size))
+
+        half = min(int(np.ceil(pad / dx)), grid_size - 1)
+        lags = dx * np.arange(-half, half + 1) / self.bandwidth
+        kernel = np.exp(-0.5 * lags**2) / (np.sqrt(2.0 * np.pi) * self.bandwidth)
+        self.density = np.maximum(fftconvolve(binned, kernel, mode='same'), 0.0)
+
+    def _bandwidth_factor(self, bw_method) -> float:
+        """Mesmas opções do bw_method de gaussian_kde"""
+        if bw_method is None or bw_method == 'scott':
+            return self.scotts_factor()
+        if bw_method == 'silverman':
+            return self.silverman_factor()
+        if np.isscalar(bw_method) and not isinstance(bw_method, str):
+            return float(bw_method)
+        if callable(bw_method):
+            return float(bw_method(self))
+        raise ValueError("`bw_method` deve ser 'scott', 'silverman', um escalar ou uma função")
+
+    def scotts_factor(self) -> float:
+        return self.neff ** (-1.0 / (self.d + 4))
+
+    def silverman_factor(self) -> float:
+        return (self.neff * (self.d + 2) / 4.0) ** (-1.0 / (self.d + 4))
+
+    def evaluate(self, points):
+        """Densidade nos pontos pedidos (interpolação linear na grade; zero fora dela)"""
+        points = np.asarray(points, dtype=np.float64)
+        return np.interp(points, self.grid, self.density, left=0.0, right=0.0)[()]
+
+    __call__ = evaluate
+    pdf = evaluate
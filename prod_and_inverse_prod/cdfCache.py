@@ -0,0 +1,95 @@
+"""
+Cache LRU, limitado e compartilhado entre threads, das integrais de P(XY <= c).
+
+Fica embaixo de ProdOfNormalRVs.compute_product_cdf_1d e de
+InverseProdOfTwoVariables._compute_product_cdf_1d (e das variantes refinadas e
+de cauda, que passam pelo mesmo _integrate_cdf): cada degrau do refine é uma
+entrada, com a chave
+
+    (muX, sigmaX, muY, sigmaY, c, epsabs, epsrel, n_sigmas, limit)
+
+já orientada (ver quadBreakpoints.orient), então as duas classes compartilham
+entradas e o resultado não depende do critério de parada de quem chama (quem
+para num degrau mais frouxo só usa menos entradas). Os valores em ponto
+flutuante entram quantizados em KEY_DIGITS algarismos significativos, para que
+o mesmo ponto calculado por caminhos diferentes (c = muX muY, 0.1 + 0.2) caia
+na mesma entrada; a diferença em F fica abaixo de densidade * |c| * 1e-13.
+
+O lock só protege o dicionário: a integral roda fora dele, e duas threads que
+pedem a mesma chave ao mesmo tempo podem calcular as duas (a segunda
+sobrescreve com o mesmo valor).
+"""
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 1 << 15
+KEY_DIGITS = 13
+
+
+def quantize(value: float, digits: int = KEY_DIGITS) -> float:
+    """value arredondado em digits algarismos significativos"""
+    return float(f"{value:.{digits}g}")
+
+
+class LruCache:
+    """Dicionário LRU com no máximo maxsize entradas e contadores de acertos e faltas"""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        # Com enabled=False, get_or_compute só calcula (sem contar nem guardar)
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Valor guardado para key ou, na falta, compute() (que passa a ser o mais recente)"""
+        if not self.enabled:
+            return compute()
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """Esvazia o cache e zera os contadores"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return (f"LruCache(entradas={len(self)}/{self.maxsize}, acertos={self.hits}, faltas={self.misses}, "
+                f"taxa={self.hit_rate:.1%})")
+
+
+# Instância do processo, usada pelas duas classes
+CDF_CACHE = LruCache()
+
+
+def integral_key(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float,
+                 epsabs: float, epsrel: float, n_sigmas: float, limit: int) -> tuple:
+    """
+    Chave de CDF_CACHE para uma integral de P(XY <= c) com parâmetros já orientados. As duas
+    classes usam o mesmo corte do integrando (quadBreakpoints.PDF_MIN), por isso ele não entra
+    """
+    return (quantize(muX), quantize(sigmaX), quantize(muY), quantize(sigmaY), quantize(c),
+            epsabs, epsrel, n_sigmas, limit)
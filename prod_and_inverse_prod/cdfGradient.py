@@ -0,0 +1,198 @@
+"""
+Sensibilidades analíticas de P(XY <= c) e do quantil c(p), sem diferenças finitas.
+
+F(c) = integral de f_X(x) g(x) dx (ver quadBreakpoints) e os parâmetros entram
+de forma diferenciável tanto em f_X quanto em g, então cada derivada é a
+integral da derivada do integrando. Com zx = (x - muX)/sigmaX,
+zy = (c/x - muY)/sigmaY e s = sinal de x:
+
+    dF/dc      = integral f_X phi(zy) / (sigmaY |x|)         (a densidade de Z)
+    dF/dmuX    = integral f_X g zx / sigmaX
+    dF/dsigmaX = integral f_X g (zx^2 - 1) / sigmaX
+    dF/dmuY    = -integral s f_X phi(zy) / sigmaY
+    dF/dsigmaY = -integral s f_X phi(zy) zy / sigmaY
+
+As seis integrais (F e as cinco derivadas) saem juntas dos mesmos nós, sobre
+os trechos de x_partition: Gauss-Legendre de GAUSS_ORDER e 2 GAUSS_ORDER pontos
+em todos os painéis de uma vez (numpy), a diferença entre as duas regras como
+estimativa de erro e bissecção só dos painéis que não passam. Cada rodada é
+uma única chamada vetorizada do integrando; o quad_vec do scipy faria o mesmo
+ponto a ponto, em Python, e custaria mais que diferenças finitas sobre o quad
+compilado.
+
+Nos intervalos em que g é constante, as derivadas em muX e sigmaX saem da
+densidade normal nas bordas e as demais são nulas (ou, com c = 0, constantes
+em forma fechada). Os limites móveis dos trechos não contribuem: g é contínua
+neles.
+
+Pelo teorema da função implícita, no quantil F(c; theta) = p vale
+dc/dtheta = -(dF/dtheta) / (dF/dc) e dc/dp = 1 / (dF/dc): a sensibilidade da
+solução custa uma passada extra do integrando, não um brentq por parâmetro.
+"""
+import math
+import numpy as np
+from scipy.special import ndtr
+from closedFormProd import classify, POINT_MASS, SCALED_NORMAL
+from quadBreakpoints import orient, x_intervals, x_partition, BAND_N_SIGMAS
+
+PARAMETERS = ("c", "muX", "sigmaX", "muY", "sigmaY")
+GAUSS_ORDER = 10
+MAX_ROUNDS = 12
+
+_SQRT2PI = math.sqrt(2.0 * math.pi)
+_X1, _W1 = np.polynomial.legendre.leggauss(GAUSS_ORDER)
+_X2, _W2 = np.polynomial.legendre.leggauss(2 * GAUSS_ORDER)
+_NODES = np.concatenate([_X1, _X2])
+
+
+def _phi(z: float) -> float:
+    return math.exp(-0.5 * z * z) / _SQRT2PI if math.isfinite(z) else 0.0
+
+
+def _vector_integrand(x: np.ndarray, c: float, muX: float, sigmaX: float, muY: float, sigmaY: float,
+                      scale_c: float) -> np.ndarray:
+    """
+    [F, dF/dc, dF/dmuX, dF/dsigmaX, dF/dmuY, dF/dsigmaY] nos pontos x (eixo 0), cada
+    derivada multiplicada pela escala do parâmetro (scale_c, sigmaX, sigmaX, sigmaY, sigmaY)
+    para que as componentes tenham a mesma ordem de grandeza no critério de erro
+    """
+    zx = (x - muX) / sigmaX
+    fx = np.exp(-0.5 * zx * zx) / (_SQRT2PI * sigmaX)
+    zy = (c / x - muY) / sigmaY
+    s = np.sign(x)
+    fg = fx * ndtr(s * zy)
+    # s f_X phi(zy): para x < 0, g = 1 - Phi(zy) e as derivadas em Y trocam de sinal
+    sfphi = s * fx * np.exp(-0.5 * zy * zy) / _SQRT2PI
+    return np.stack([fg, sfphi * scale_c / (sigmaY * x), fg * zx, fg * (zx * zx - 1.0), -sfphi, -sfphi * zy])
+
+
+def _integrate_panels(integrand, edges: list, args: tuple, epsabs: float, epsrel: float) -> tuple:
+    """
+    Integral vetorial sobre os painéis (a, b) de edges, com bissecção adaptativa: um painel
+    é aceito quando as regras de GAUSS_ORDER e 2 GAUSS_ORDER pontos concordam dentro da sua
+    fração (pelo comprimento) da tolerância. Devolve (soma, soma das estimativas de erro).
+    """
+    a = np.array([e[0] for e in edges], dtype=np.float64)
+    b = np.array([e[1] for e in edges], dtype=np.float64)
+    total_length = np.sum(b - a)
+    total = 0.0
+    err = 0.0
+    for round_ in range(MAX_ROUNDS):
+        mid = 0.5 * (a + b)
+        half = 0.5 * (b - a)
+        values = integrand(mid[:, None] + half[:, None] * _NODES, *args)  # (componentes, painéis, nós)
+        coarse = half * (values[:, :, :GAUSS_ORDER] @ _W1)
+        fine = half * (values[:, :, GAUSS_ORDER:] @ _W2)
+        panel_err = np.max(np.abs(fine - coarse), axis=0)
+
+        tol = max(epsabs, epsrel * np.max(np.abs(total + fine.sum(axis=1))))
+        done = panel_err <= tol * (b - a) / total_length
+        if round_ == MAX_ROUNDS - 1:
+            done[:] = True
+        total = total + fine[:, done].sum(axis=1)
+        err += panel_err[done].sum()
+        if done.all():
+            break
+        a, b, mid = a[~done], b[~done], mid[~done]
+        a, b = np.concatenate([a, mid]), np.concatenate([mid, b])
+    return total, err
+
+
+def _scaled_normal_gradient(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float) -> tuple:
+    """Z ~ N(muX muY, |a| sigma) com um fator constante a; F é par no sigma nulo, que tem derivada 0"""
+    if sigmaX == 0:
+        scale = abs(muX) * sigmaY
+        d_scale = {"muX": math.copysign(sigmaY, muX), "sigmaY": abs(muX)}
+    else:
+        scale = abs(muY) * sigmaX
+        d_scale = {"muY": math.copysign(sigmaX, muY), "sigmaX": abs(muY)}
+    z = (c - muX * muY) / scale
+    dens = _phi(z) / scale
+    d_loc = {"muX": muY, "muY": muX}
+    grad = {"c": dens}
+    for name in PARAMETERS[1:]:
+        grad[name] = -dens * d_loc.get(name, 0.0) - dens * z * d_scale.get(name, 0.0)
+    return float(ndtr(z)), {name: float(v) for name, v in grad.items()}
+
+
+def product_cdf_gradient(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float,
+                         epsabs: float = 1e-10, epsrel: float = 1e-8, n_sigmas: float = 12.0) -> tuple:
+    """
+    (P(XY <= c), gradiente, cota de erro): gradiente é um dict com as derivadas em
+    PARAMETERS. Com c = 0 a densidade de Z diverge (singularidade logarítmica) e
+    dF/dc é inf. Numa massa pontual as derivadas são nulas fora do salto.
+    """
+    closed = classify(muX, sigmaX, muY, sigmaY)
+    if closed is not None and closed.kind == POINT_MASS:
+        return float(closed.cdf(c)), dict.fromkeys(PARAMETERS, 0.0), 0.0
+    if closed is not None and closed.kind == SCALED_NORMAL:
+        value, grad = _scaled_normal_gradient(c, muX, sigmaX, muY, sigmaY)
+        return value, grad, 0.0
+
+    oriented = orient(muX, sigmaX, muY, sigmaY)
+    swapped = oriented != (muX, sigmaX, muY, sigmaY)
+    muX, sigmaX, muY, sigmaY = oriented
+    scale_c = math.sqrt(muX**2 * sigmaY**2 + muY**2 * sigmaX**2 + sigmaX**2 * sigmaY**2)
+
+    # Componentes escaladas, na ordem de _vector_integrand
+    total = np.zeros(6)
+    total[0], pieces = x_partition(c, muX, sigmaX, muY, sigmaY, n_sigmas=n_sigmas)
+    err = ndtr(-BAND_N_SIGMAS) + 2.0 * ndtr(-n_sigmas)
+
+    # Intervalos planos: g = q constante (dependente de muY e sigmaY só quando c = 0)
+    t = muY / sigmaY
+    for a, b, q, positive_x in x_intervals(c, muY, sigmaY):
+        if not q:
+            continue
+        za = (a - muX) / sigmaX
+        zb = (b - muX) / sigmaX
+        phi_a, phi_b = _phi(za), _phi(zb)
+        total[2] += q * (phi_a - phi_b)
+        total[3] += q * ((za * phi_a if phi_a else 0.0) - (zb * phi_b if phi_b else 0.0))
+        if c == 0:
+            sign = 1.0 if positive_x else -1.0
+            mass = ndtr(zb) - ndtr(za)
+            total[4] -= sign * _phi(t) * mass
+            total[5] += sign * _phi(t) * t * mass
+
+    # Os painéis iniciais já cortam em muX e c/muY (os `points` do quad)
+    edges = []
+    for lower, upper, points, positive_x in pieces:
+        cuts = [lower] + sorted(points or []) + [upper]
+        edges.extend(zip(cuts[:-1], cuts[1:]))
+    if edges:
+        part, part_err = _integrate_panels(_vector_integrand, edges, (c, muX, sigmaX, muY, sigmaY, scale_c),
+                                           epsabs, epsrel)
+        total += part
+        err += part_err
+
+    grad = {
+        "c": math.inf if c == 0 else float(total[1] / scale_c),
+        "muX": float(total[2] / sigmaX),
+        "sigmaX": float(total[3] / sigmaX),
+        "muY": float(total[4] / sigmaY),
+        "sigmaY": float(total[5] / sigmaY),
+    }
+    if swapped:
+        grad["muX"], grad["muY"] = grad["muY"], grad["muX"]
+        grad["sigmaX"], grad["sigmaY"] = grad["sigmaY"], grad["sigmaX"]
+    return float(total[0]), grad, float(err)
+
+
+def quantile_gradient(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float, **kwargs) -> dict:
+    """
+    Derivadas da solução c de P(XY <= c) = p em relação a muX, sigmaX, muY, sigmaY e p,
+    pelo teorema da função implícita. Numa massa pontual com os dois fatores constantes,
+    c = muX muY; com um fator constante nulo a solução não é diferenciável (nan).
+    """
+    closed = classify(muX, sigmaX, muY, sigmaY)
+    if closed is not None and closed.kind == POINT_MASS:
+        if sigmaX == 0 and sigmaY == 0 and muX != 0 and muY != 0:
+            return {"muX": muY, "sigmaX": 0.0, "muY": muX, "sigmaY": 0.0, "p": 0.0}
+        return dict.fromkeys(PARAMETERS[1:] + ("p",), math.nan)
+
+    _, grad, _ = product_cdf_gradient(c, muX, sigmaX, muY, sigmaY, **kwargs)
+    density = grad["c"]
+    sens = {name: -grad[name] / density for name in PARAMETERS[1:]}
+    sens["p"] = 1.0 / density
+    return sens
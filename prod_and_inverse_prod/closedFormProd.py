@@ -0,0 +1,74 @@
+"""
+Células degeneradas de Z = XY com resposta exata em forma fechada.
+
+A planilha vira 0.0 nas células em branco, então muitas tarefas chegam com
+sigma = 0 ou mu = 0. classify reconhece três casos:
+
+- massa pontual: os dois fatores constantes, ou um deles constante igual a 0;
+- normal escalada: um fator constante a != 0, Z ~ N(muX muY, |a| sigma do outro);
+- produto de normais centradas (muX = muY = 0): com s = sigmaX sigmaY a
+  densidade é K0(|z|/s) / (pi s) e a CDF sai da integral de K0 (scipy.special.iti0k0):
+
+      P(Z <= c) = 1/2 + sign(c) / pi * integral_0^{|c|/s} K0(u) du
+
+Nos outros casos devolve None e quem chama segue pelo caminho geral.
+"""
+import math
+import numpy as np
+from scipy.optimize import brentq
+from scipy.special import iti0k0, ndtr, ndtri
+
+POINT_MASS = "point_mass"
+SCALED_NORMAL = "scaled_normal"
+BESSEL_K0 = "bessel_k0"
+
+
+class ClosedFormProduct:
+    """CDF e inversa exatas de um caso degenerado (ver classify)"""
+
+    def __init__(self, kind: str, loc: float, scale: float = 0.0):
+        self.kind = kind
+        self.loc = loc
+        self.scale = scale
+        # Cota de erro das funções especiais usadas em cdf
+        self.error = 1e-14 if kind == BESSEL_K0 else 0.0
+
+    def cdf(self, c):
+        """P(Z <= c) para um limiar ou um array de limiares"""
+        c = np.asarray(c, dtype=np.float64)
+        if self.kind == POINT_MASS:
+            return np.where(c >= self.loc, 1.0, 0.0)[()]
+        if self.kind == SCALED_NORMAL:
+            return ndtr((c - self.loc) / self.scale)[()]
+        return (0.5 + np.sign(c) * iti0k0(np.abs(c) / self.scale)[1] / math.pi)[()]
+
+    def ppf(self, p: float) -> float:
+        """Menor c com P(Z <= c) >= p"""
+        if self.kind == POINT_MASS:
+            return self.loc
+        if self.kind == SCALED_NORMAL:
+            return self.loc + self.scale * ndtri(p)
+
+        # Resolve integral_0^u K0 = pi |p - 1/2| em u (a integral cresce de 0 a pi/2); além de
+        # u = 64 o que falta é < 1e-28, abaixo da resolução de pi/2 em ponto flutuante
+        upper = 64.0
+        target = min(math.pi * abs(p - 0.5), iti0k0(upper)[1])
+        if target == 0.0:
+            return 0.0
+        u = brentq(lambda x: iti0k0(x)[1] - target, 0.0, upper, xtol=1e-14, rtol=1e-14)
+        return math.copysign(self.scale * u, p - 0.5)
+
+
+def classify(muX: float, sigmaX: float, muY: float, sigmaY: float):
+    """ClosedFormProduct se a célula for degenerada, senão None"""
+    if (sigmaX == 0 and muX == 0) or (sigmaY == 0 and muY == 0):
+        return ClosedFormProduct(POINT_MASS, 0.0)
+    if sigmaX == 0 and sigmaY == 0:
+        return ClosedFormProduct(POINT_MASS, float(muX * muY))
+    if sigmaX == 0:
+        return ClosedFormProduct(SCALED_NORMAL, muX * muY, abs(muX) * sigmaY)
+    if sigmaY == 0:
+        return ClosedFormProduct(SCALED_NORMAL, muX * muY, abs(muY) * sigmaX)
+    if muX == 0 and muY == 0:
+        return ClosedFormProduct(BESSEL_K0, 0.0, sigmaX * sigmaY)
+    return None
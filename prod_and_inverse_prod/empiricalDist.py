@@ -0,0 +1,95 @@
+"""
+Distribuição empírica de Z = XY montada uma vez por célula.
+
+SortedSample ordena a amostra inteira uma vez; HistogramSketch é preenchido
+bloco a bloco durante o Monte Carlo em blocos (memória fixa, sem guardar Z).
+Os dois respondem cdf(c) e quantile(p) para qualquer número de consultas em
+O(log n) cada, em vez de varrer as amostras de novo a cada limiar.
+"""
+import numpy as np
+
+DEFAULT_N_BINS = 4096
+# Faixa do histograma, em desvios padrão teóricos em torno da média
+SKETCH_N_SIGMAS = 8.0
+
+
+class SortedSample:
+    """CDF empírica exata a partir da amostra completa"""
+
+    def __init__(self, z: np.ndarray):
+        self.sorted = np.sort(z)
+        self.n = self.sorted.size
+
+    def cdf(self, c):
+        """Fração de amostras <= c"""
+        return (np.searchsorted(self.sorted, c, side='right') / self.n)[()]
+
+    def quantile(self, p):
+        """Menor amostra com cdf >= p"""
+        k = np.clip(np.ceil(np.asarray(p, dtype=np.float64) * self.n).astype(np.int64) - 1, 0, self.n - 1)
+        return self.sorted[k][()]
+
+
+class HistogramSketch:
+    """
+    Histograma de bins uniformes em [lo, hi], com contagem abaixo/acima da faixa,
+    mínimo e máximo exatos. Dentro de um bin a CDF é interpolada linearmente;
+    nos limiares passados em exact_thresholds a contagem é exata.
+    """
+
+    def __init__(self, lo: float, hi: float, n_bins: int = DEFAULT_N_BINS, exact_thresholds=()):
+        self.lo = lo
+        self.hi = hi
+        self.n_bins = n_bins
+        self.width = (hi - lo) / n_bins
+        self.counts = np.zeros(n_bins + 2, dtype=np.int64)  # [abaixo, bins..., acima]
+        self.thresholds = np.unique(np.asarray(exact_thresholds, dtype=np.float64))
+        self.threshold_hits = np.zeros(self.thresholds.size, dtype=np.int64)
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._cum = None
+
+    @classmethod
+    def around(cls, mean: float, std: float, n_bins: int = DEFAULT_N_BINS, exact_thresholds=()) -> "HistogramSketch":
+        """Faixa mean +- SKETCH_N_SIGMAS std (a média e o desvio de Z são conhecidos em forma fechada)"""
+        half = SKETCH_N_SIGMAS * std if std > 0 else max(abs(mean), 1.0)
+        return cls(mean - half, mean + half, n_bins, exact_thresholds)
+
+    def update(self, z: np.ndarray):
+        if z.size == 0:
+            return
+        idx = np.floor((z - self.lo) / self.width).astype(np.int64)
+        np.clip(idx + 1, 0, self.n_bins + 1, out=idx)
+        self.counts += np.bincount(idx, minlength=self.n_bins + 2)
+        for i, t in enumerate(self.thresholds):
+            self.threshold_hits[i] += np.count_nonzero(z <= t)
+        self.n += z.size
+        self.min = min(self.min, float(z.min()))
+        self.max = max(self.max, float(z.max()))
+        self._cum = None
+
+    def _knots(self) -> tuple:
+        """Pontos (z, contagem acumulada) da CDF linear por partes"""
+        if self._cum is None:
+            edges = self.lo + self.width * np.arange(self.n_bins + 1)
+            x = np.concatenate([[min(self.min, self.lo)], edges, [max(self.max, self.hi)]])
+            y = np.concatenate([[0], np.cumsum(self.counts)]).astype(np.float64)
+            self._cum = (x, y)
+        return self._cum
+
+    def cdf(self, c):
+        x, y = self._knots()
+        c = np.asarray(c, dtype=np.float64)
+        res = np.interp(c, x, y) / self.n
+        # Limiares registrados: contagem exata
+        if self.thresholds.size:
+            pos = np.searchsorted(self.thresholds, c)
+            pos = np.minimum(pos, self.thresholds.size - 1)
+            exact = self.thresholds[pos] == c
+            res = np.where(exact, self.threshold_hits[pos] / self.n, res)
+        return res[()]
+
+    def quantile(self, p):
+        x, y = self._knots()
+        return np.interp(np.asarray(p, dtype=np.float64) * self.n, y, x)[()]
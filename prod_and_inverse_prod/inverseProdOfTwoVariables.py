@@ -1,32 +1,78 @@
 import numpy as np
 from scipy.stats import norm
-from scipy.integrate import quad
 from scipy.optimize import brentq, fsolve
 import matplotlib.pyplot as plt
-from joblib import Parallel, delayed
-import warnings
+from numbaIntegrand import integrand_llc, density_llc
+from saddlepointProd import saddlepoint_ppf
+from cdfCurve import ProductCdfCurve
+from closedFormProd import classify
+from cosProd import CosSeries, ENGINES, DEFAULT_N_TERMS
+from batchProdPpf import solve_product_ppf_batch, BatchPpfResult
+from cdfGradient import quantile_gradient
+from quadBreakpoints import orient, integrate_partition, integrate_density, refine, sign_settled, PDF_MIN
+from newtonRoot import safeguarded_halley
+from quantileSurface import get_surface
+from cdfCache import CDF_CACHE, integral_key
+from precisionProfiles import get_profile, PROFILES, DEFAULT_PROFILE
+from sampleBank import NormalBank
+from monteCarlo import (streaming_product_mc, sequential_product_mc, reduced_variance_product_mc,
+                        wilson_halfwidth, DEFAULT_CHUNK_SIZE)
 
 class InverseProdOfTwoVariables:
+
+    # Usa o integrando compilado (numba) no quad quando disponível
+    use_numba: bool = integrand_llc is not None
+    # Com engine="cos", a série COS só é aceita se a estimativa de erro for <= cos_tol; senão, brentq
+    cos_tol: float = 1e-8
+    # A partir deste alvo a inversa resolve log P(XY > c) = log(1 - target_p)
+    tail_p: float = 0.9
+    # Newton/Halley com pares CDF + densidade a partir do chute normal (ver newtonRoot); brentq
+    # fica como reserva. Com False, vai direto ao brentq
+    use_newton: bool = True
+    # O Newton/Halley parte do quantil da superfície pré-calculada (ver quantileSurface), quando ela
+    # existe e cobre a célula; o primeiro passo é o polimento contra a CDF exata
+    use_surface: bool = True
+
     def __init__(
         self,
         muX: float,
         sigmaX: float,
         muY: float,
         sigmaY: float,
-        target_p: float = 0.98
+        target_p: float = 0.98,
+        approx_tol: float = None,
+        engine: str = "quad",
+        profile: str = DEFAULT_PROFILE
     ):
         self.muX: float = muX      
         self.sigmaX: float = sigmaX    
         self.muY: float = muY      
         self.sigmaY: float = sigmaY   
         self.target_p: float = target_p 
+        # Se definido, tenta o ponto de sela antes do brentq e aceita quando o erro estimado <= approx_tol
+        self.approx_tol = approx_tol
+        # "quad" (integração adaptativa) ou "cos" (série de cossenos, ver cosProd)
+        if engine not in ENGINES:
+            raise ValueError(f"Motor desconhecido: {engine!r}. Opções: {ENGINES}")
+        self.engine = engine
+        # Tolerâncias do quad e do brentq (ver precisionProfiles)
+        self.profile = get_profile(profile)
+        # Células degeneradas (sigma = 0, mu = 0) têm inversa exata e dispensam brentq e Monte Carlo
+        self.closed_form = classify(muX, sigmaX, muY, sigmaY)
 
         self.theoretical_mean: float = muX * muY
         self.theoretical_variance: float = muX**2 * sigmaY**2 + muY**2 * sigmaX**2 + sigmaX**2 * sigmaY**2
         self.theoretical_std: float = np.sqrt(self.theoretical_variance)
 
         self.c_solution = None
+        self.solution_error = None
+        self.solution_method = None
+        # Avaliações conjuntas (CDF + densidade) do Newton/Halley, quando ele roda
+        self.solution_iterations = None
+        self.solution_gradient = None
         self.mc_p = None
+        self.mc_n_samples = None
+        self.mc_ci_halfwidth = None
 
     @staticmethod
     def _integrand(x: float, c: float, muX: float, sigmaX: float, muY: float, sigmaY: float, positive_x: bool) -> float:
@@ -38,7 +84,7 @@ class InverseProdOfTwoVariables:
         
         # PDF de X com verificação de underflow
         pdf_x = norm.pdf(x, loc=muX, scale=sigmaX)
-        if pdf_x < 1e-300:
+        if pdf_x < PDF_MIN:
             return 0.0
         
         try:
@@ -57,115 +103,205 @@ class InverseProdOfTwoVariables:
             else:
                 return 0.0 if c > 0 else pdf_x
         
-        # Calcula CDF de Y
+        # Calcula CDF de Y (para x < 0, a cauda direta pelo sf, sem o cancelamento de 1 - cdf)
         if positive_x:
             cdf_y = norm.cdf(y_threshold, loc=muY, scale=sigmaY)
         else:
-            cdf_y = 1 - norm.cdf(y_threshold, loc=muY, scale=sigmaY)
+            cdf_y = norm.sf(y_threshold, loc=muY, scale=sigmaY)
         
         return cdf_y * pdf_x
 
+    @staticmethod
+    def _density(x: float, c: float, muX: float, sigmaX: float, muY: float, sigmaY: float, order: float) -> float:
+        """Densidade de XY sob a integral (order 0) ou a derivada dela em c (order 1), como density_llc"""
+        if np.abs(x) < 1e-12:
+            return 0.0
+        zy = (c / x - muY) / sigmaY
+        value = norm.pdf(x, loc=muX, scale=sigmaX) * norm.pdf(zy) / (sigmaY * np.abs(x))
+        if order == 0:
+            return value
+        return -value * zy / (sigmaY * x)
+
+    @staticmethod
+    def _compute_product_pdf(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float,
+                             orders: tuple = (0,), profile=PROFILES[DEFAULT_PROFILE]) -> list:
+        """[densidade de XY em c, derivada dela em c][orders] nos trechos do quad (ver quadBreakpoints)"""
+        muX, sigmaX, muY, sigmaY = orient(muX, sigmaX, muY, sigmaY)
+        density = density_llc if InverseProdOfTwoVariables.use_numba else InverseProdOfTwoVariables._density
+        return integrate_density(c, muX, sigmaX, muY, sigmaY, density, orders,
+                                 n_sigmas=profile.n_sigmas, limit=profile.limit)
+
     @staticmethod
     def _compute_product_cdf_1d(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float) -> float:
         """
         Calcula P(XY <= c) com integração numérica robusta
-        Usa limites finitos ao invés de infinitos
+        Integra sobre a variável de maior CV (X e Y trocam de papel se preciso). Os intervalos
+        de x em que P(Y <= c/x) é constante (0 ou 1) entram em forma fechada pela CDF normal
+        de X; o quad só integra os trechos da transição (ver quadBreakpoints)
         """
-        
-        # Define limites finitos baseados na distribuição de X
-        n_sigmas = 10  # Cobre ~99.9999% da distribuição
-        x_min = muX - n_sigmas * sigmaX
-        x_max = muX + n_sigmas * sigmaX
-        
-        # Garante intervalo mínimo
-        if x_max - x_min < 1e-6:
-            x_min = muX - 10.0
-            x_max = muX + 10.0
-        
-        epsilon = 1e-12
-        
         # Tolerâncias mais relaxadas para melhor convergência
-        epsabs = 1e-8  # Era 1e-10
-        epsrel = 1e-6  # Era 1e-8
-        limit = 150    # Era 500
-        
-        result = 0.0
-        
-        # Integra sobre x < 0 (se aplicável)
-        neg_lower = x_min
-        neg_upper = -epsilon
-        
-        if neg_lower < neg_upper and neg_upper < x_max:
-            try:
-                with warnings.catch_warnings():
-                    warnings.filterwarnings('ignore', category=Warning)
-                    part1, err1 = quad(
-                        InverseProdOfTwoVariables._integrand,
-                        neg_lower, neg_upper,
-                        args=(c, muX, sigmaX, muY, sigmaY, False),
-                        epsabs=epsabs,
-                        epsrel=epsrel,
-                        limit=limit
-                    )
-                    result += part1
-            except Exception as e:
-                # Se falhar, ignora esta parte (contribuição muito pequena)
-                pass
-        
-        # Integra sobre x > 0 (se aplicável)
-        pos_lower = epsilon
-        pos_upper = x_max
-        
-        if pos_lower < pos_upper and pos_lower > x_min:
-            try:
-                with warnings.catch_warnings():
-                    warnings.filterwarnings('ignore', category=Warning)
-                    part2, err2 = quad(
-                        InverseProdOfTwoVariables._integrand,
-                        pos_lower, pos_upper,
-                        args=(c, muX, sigmaX, muY, sigmaY, True),
-                        epsabs=epsabs,
-                        epsrel=epsrel,
-                        limit=limit
-                    )
-                    result += part2
-            except Exception as e:
-                # Se falhar, tenta com limites mais conservadores
-                try:
-                    pos_lower_safe = max(epsilon, muX - 5*sigmaX)
-                    pos_upper_safe = min(x_max, muX + 5*sigmaX)
-                    with warnings.catch_warnings():
-                        warnings.filterwarnings('ignore', category=Warning)
-                        part2, _ = quad(
-                            InverseProdOfTwoVariables._integrand,
-                            pos_lower_safe, pos_upper_safe,
-                            args=(c, muX, sigmaX, muY, sigmaY, True),
-                            epsabs=1e-6,
-                            epsrel=1e-4,
-                            limit=100
-                        )
-                        result += part2
-                except:
-                    pass
+        result, _ = InverseProdOfTwoVariables._integrate_cdf(c, muX, sigmaX, muY, sigmaY, epsabs=1e-8, epsrel=1e-6)
         
         # Garante resultado válido
-        result = np.clip(result, 0.0, 1.0)
-        return float(result)
+        return float(np.clip(result, 0.0, 1.0))
+
+    @staticmethod
+    def _compute_product_sf_1d(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float) -> float:
+        """
+        Calcula P(XY > c) com precisão relativa na cauda
+        P(XY > c) = P((-X)Y <= -c): a mesma integral calcula direto a probabilidade pequena,
+        em vez de 1 - CDF, e o quad só usa tolerância relativa
+        """
+        result, _ = InverseProdOfTwoVariables._integrate_sf(c, muX, sigmaX, muY, sigmaY, epsabs=0.0, epsrel=1e-8)
+        return float(np.clip(result, 0.0, 1.0))
+
+    @staticmethod
+    def _compute_product_cdf_refined(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float,
+                                     settled, profile=PROFILES[DEFAULT_PROFILE]) -> tuple:
+        """(P(XY <= c), cota de erro), apertando as tolerâncias só até settled(valor, erro) (ver quadBreakpoints.refine)"""
+        return refine(
+            lambda epsabs, epsrel: InverseProdOfTwoVariables._integrate_cdf(c, muX, sigmaX, muY, sigmaY, epsabs, epsrel,
+                                                                            profile.n_sigmas, profile.limit),
+            settled, ladder=profile.ladder
+        )
+
+    @staticmethod
+    def _compute_product_sf_refined(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float,
+                                    settled, profile=PROFILES[DEFAULT_PROFILE]) -> tuple:
+        """(P(XY > c), cota de erro), como _compute_product_cdf_refined mas só com tolerância relativa"""
+        return refine(
+            lambda epsabs, epsrel: InverseProdOfTwoVariables._integrate_sf(c, muX, sigmaX, muY, sigmaY, 0.0, epsrel,
+                                                                           profile.n_sigmas, profile.limit),
+            settled, ladder=profile.ladder
+        )
+
+    @staticmethod
+    def _integrate_sf(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float,
+                      epsabs: float, epsrel: float, n_sigmas: float = 12.0, limit: int = 200) -> tuple:
+        """P(XY > c) = P((-X)Y <= -c), com a cota de erro"""
+        return InverseProdOfTwoVariables._integrate_cdf(-c, -muX, sigmaX, muY, sigmaY, epsabs, epsrel, n_sigmas, limit)
 
-    def solve_inverse_cdf(self, n_samples=1000000) -> float:
+    @staticmethod
+    def _integrate_cdf(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float,
+                       epsabs: float, epsrel: float, n_sigmas: float = 12.0, limit: int = 200) -> tuple:
+        """
+        (P(XY <= c), cota de erro) sobre a partição de quadBreakpoints, sem o corte em [0, 1];
+        guardado em CDF_CACHE (ver cdfCache), compartilhado com ProdOfNormalRVs
+        """
+        muX, sigmaX, muY, sigmaY = orient(muX, sigmaX, muY, sigmaY)
+        
+        if InverseProdOfTwoVariables.use_numba:
+            integrand = integrand_llc
+            args_neg = args_pos = (c, muX, sigmaX, muY, sigmaY, PDF_MIN)
+        else:
+            integrand = InverseProdOfTwoVariables._integrand
+            args_neg = (c, muX, sigmaX, muY, sigmaY, False)
+            args_pos = (c, muX, sigmaX, muY, sigmaY, True)
+
+        return CDF_CACHE.get_or_compute(
+            integral_key(c, muX, sigmaX, muY, sigmaY, epsabs, epsrel, n_sigmas, limit),
+            lambda: integrate_partition(c, muX, sigmaX, muY, sigmaY, integrand, args_pos, args_neg,
+                                        epsabs, epsrel, n_sigmas=n_sigmas, limit=limit)
+        )
+
+    @staticmethod
+    def compute_product_ppf_cos(muX, sigmaX, muY, sigmaY, p, n_terms: int = DEFAULT_N_TERMS) -> np.ndarray:
+        """Quantis de várias células de uma vez, resolvidos na série COS (ver cosProd)"""
+        return CosSeries(muX, sigmaX, muY, sigmaY, n_terms=n_terms).ppf(p)
+
+    @staticmethod
+    def solve_inverse_cdf_batch(muX, sigmaX, muY, sigmaY, target_p=0.98, profile=DEFAULT_PROFILE,
+                                n_nodes: int = 128) -> BatchPpfResult:
+        """
+        Inversa de várias células de uma vez (por exemplo uma partição inteira da planilha): intervalo
+        e Illinois vetorizados sobre o motor de batchProdCdf, com as células convergidas fora das
+        chamadas seguintes (ver batchProdPpf). Com use_surface e a superfície de quantis gravada, as
+        células que ela cobre partem do valor tabelado e só dão passos de polimento. Devolve c,
+        iterations e converged por célula, sem arredondar e sem validação Monte Carlo; xtol e rtol
+        vêm do perfil de precisão
+        """
+        profile = get_profile(profile)
+        surface = get_surface() if InverseProdOfTwoVariables.use_surface else None
+        return solve_product_ppf_batch(muX, sigmaX, muY, sigmaY, target_p, xtol=profile.xtol, rtol=profile.rtol,
+                                       tail_p=InverseProdOfTwoVariables.tail_p, n_nodes=n_nodes, surface=surface)
+
+    def solve_inverse_cdf(self, n_samples=1000000, chunk_size: int = None, dtype=np.float64, mc_tol: float = None,
+                          estimator: str = "plain", rng: np.random.Generator = None,
+                          bank: NormalBank = None, validate: bool = True) -> float:
         """
         Resolve P(XY <= c) = target_p para encontrar c
         Usa método robusto com fallbacks
+        Com chunk_size, a validação Monte Carlo roda em blocos com memória constante
+        Com mc_tol, a validação para quando a meia-largura do IC 95% fica <= mc_tol (n_samples é o teto)
+        estimator escolhe "antithetic", "control" ou "sobol" (ver monteCarlo.ESTIMATORS) para a validação
+        rng (numpy.random.Generator) torna a validação reproduzível; sem ele, usa um gerador novo
+        Com bank (sampleBank.NormalBank), a validação lê os pares normais do banco compartilhado
+        Células degeneradas (ver closedFormProd) saem em forma fechada, sem validação Monte Carlo
+        Com engine="cos", o quantil sai da série COS (ver cosProd) quando o erro dela é <= cos_tol
+        No caminho por integração, Newton/Halley (ver newtonRoot) parte da superfície de quantis (ver
+        quantileSurface) ou do chute normal com pares CDF + densidade; se não convergir, segue pelo brentq
+        Com validate=False, não roda a validação Monte Carlo (mc_p fica None)
         """
         
+        if self.closed_form is not None:
+            self.c_solution = self.closed_form.ppf(self.target_p)
+            self.mc_p = float(self.closed_form.cdf(self.c_solution))
+            # Numa massa pontual P(Z <= c) salta de 0 a 1 e |P - alvo| não vai a zero
+            self.solution_error = abs(self.mc_p - self.target_p) + self.closed_form.error
+            self.solution_method = self.closed_form.kind
+            self.mc_n_samples = 0
+            self.mc_ci_halfwidth = 0.0
+            return round(self.c_solution, 6)
+
         # Chute inicial baseado na aproximação normal
         self.initial_guess = norm.ppf(self.target_p, loc=self.theoretical_mean, scale=self.theoretical_std)
         
-        # Função objetivo
-        def objective(c):
-            return InverseProdOfTwoVariables._compute_product_cdf_1d(
-                c, self.muX, self.sigmaX, self.muY, self.sigmaY
-            ) - self.target_p
+        # Função objetivo; guarda (valor, erro) de cada avaliação para certificar a solução no fim
+        evaluations = {}
+        tail = self.tail_p <= self.target_p < 1.0
+        if tail:
+            # Cauda: crescente em c como F - p, com precisão relativa e bem escalada mesmo para 1 - p ~ 1e-9
+            log_q = np.log1p(-self.target_p)
+
+            settled = sign_settled(1.0 - self.target_p)
+
+            def objective(c):
+                c = float(np.squeeze(c))  # o fsolve passa arrays de um elemento
+                evaluations[c] = InverseProdOfTwoVariables._compute_product_sf_refined(
+                    c, self.muX, self.sigmaX, self.muY, self.sigmaY, settled, self.profile
+                )
+                sf, err = evaluations[c]
+                return log_q - np.log(max(sf, np.finfo(float).tiny))
+
+            def joint(c):
+                # d/dc [log q - log S] = pdf / S; a segunda derivada é pdf' / S + (pdf / S)^2
+                r = objective(c)
+                sf, err = evaluations[c]
+                if abs(sf - (1.0 - self.target_p)) <= err or sf <= 0:
+                    return r, np.nan, np.nan, sf > 0
+                pdf, dpdf = InverseProdOfTwoVariables._compute_product_pdf(
+                    c, self.muX, self.sigmaX, self.muY, self.sigmaY, (0, 1), self.profile
+                )
+                return r, pdf / sf, dpdf / sf + (pdf / sf)**2, False
+        else:
+            # Tolerâncias frouxas bastam enquanto o erro não pode trocar o sinal de F(c) - p
+            settled = sign_settled(self.target_p)
+
+            def objective(c):
+                c = float(np.squeeze(c))  # o fsolve passa arrays de um elemento
+                evaluations[c] = InverseProdOfTwoVariables._compute_product_cdf_refined(
+                    c, self.muX, self.sigmaX, self.muY, self.sigmaY, settled, self.profile
+                )
+                return evaluations[c][0] - self.target_p
+
+            def joint(c):
+                r = objective(c)
+                if abs(r) <= evaluations[c][1]:
+                    return r, np.nan, np.nan, True
+                pdf, dpdf = InverseProdOfTwoVariables._compute_product_pdf(
+                    c, self.muX, self.sigmaX, self.muY, self.sigmaY, (0, 1), self.profile
+                )
+                return r, pdf, dpdf, False
         
         # Estratégia adaptativa para encontrar limites válidos
         def find_valid_bounds():
@@ -214,42 +350,129 @@ class InverseProdOfTwoVariables:
             
             return None, None, False
         
-        # Tenta encontrar solução
-        try:
-            lower_bound, upper_bound, found = find_valid_bounds()
-            
-            if found:
-                # Usa brentq com limites válidos
-                self.c_solution = brentq(
-                    objective,
-                    lower_bound,
-                    upper_bound,
-                    xtol=1e-8,
-                    rtol=1e-6,
-                    maxiter=100
-                )
-            else:
-                # Fallback: usa fsolve
-                result = fsolve(objective, self.initial_guess, full_output=True, xtol=1e-6)
-                self.c_solution = float(result[0][0])
-                
-                # Verifica se fsolve convergiu
-                if result[2] != 1:
-                    # Se fsolve falhou, usa o chute inicial
-                    self.c_solution = self.initial_guess
+        approx_err = np.inf
+        if self.approx_tol is not None:
+            c_approx, approx_err = saddlepoint_ppf(self.target_p, self.muX, self.sigmaX, self.muY, self.sigmaY)
+
+        series = CosSeries(self.muX, self.sigmaX, self.muY, self.sigmaY) if self.engine == "cos" else None
+
+        if self.approx_tol is not None and approx_err <= self.approx_tol:
+            # Ponto de sela com erro estimado dentro da tolerância: dispensa o brentq
+            self.c_solution = c_approx
+            self.solution_error = approx_err
+            self.solution_method = "saddlepoint"
+        elif series is not None and series.error[0] <= self.cos_tol:
+            # Quantil resolvido na própria série COS
+            self.c_solution = float(series.ppf(self.target_p))
+            self.solution_error = abs(float(series.cdf(self.c_solution)) - self.target_p) + float(series.error[0])
+            self.solution_method = "cos"
+        else:
+            self.solution_method = "brentq"
+            # Tenta encontrar solução
+            try:
+                root = None
+                if self.use_newton:
+                    # Newton/Halley a partir da superfície ou do chute normal; a guarda cresce só se preciso
+                    surface = get_surface() if self.use_surface else None
+                    start = np.nan
+                    if surface is not None:
+                        start = surface.quantile_1d(self.muX, self.sigmaX, self.muY, self.sigmaY, self.target_p)
+                    from_surface = bool(np.isfinite(start))
+                    root = safeguarded_halley(joint, start if from_surface else self.initial_guess,
+                                              self.theoretical_std, xtol=self.profile.xtol, rtol=self.profile.rtol)
+                    self.solution_iterations = root.n_evals
+
+                if root is not None and root.converged:
+                    self.c_solution = root.x
+                    self.solution_method = "surface" if from_surface else "halley"
+                else:
+                    lower_bound, upper_bound, found = find_valid_bounds()
+
+                    if found:
+                        # Usa brentq com limites válidos
+                        self.c_solution = brentq(
+                            objective,
+                            lower_bound,
+                            upper_bound,
+                            xtol=self.profile.xtol,
+                            rtol=self.profile.rtol,
+                            maxiter=100
+                        )
+                    else:
+                        # Fallback: usa fsolve
+                        result = fsolve(objective, self.initial_guess, full_output=True, xtol=self.profile.rtol)
+                        self.c_solution = float(result[0][0])
+
+                        # Verifica se fsolve convergiu
+                        if result[2] != 1:
+                            # Se fsolve falhou, usa o chute inicial
+                            self.c_solution = self.initial_guess
         
-        except Exception as e:
-            # Último fallback: chute inicial
-            self.c_solution = self.initial_guess
+            except Exception as e:
+                # Último fallback: chute inicial
+                self.c_solution = self.initial_guess
+
+            # Cota de |P(XY <= c) - target_p| na solução: |valor - alvo| + erro, com a avaliação
+            # que o brentq já fez em c. Se a solução veio de outro caminho (o último passo do Newton,
+            # o fsolve), uma integral direto no degrau mais apertado: perto da raiz o sinal não se
+            # firma e o refine subiria todos os degraus
+            if self.c_solution not in evaluations:
+                epsabs, epsrel = self.profile.ladder[-1]
+                integrate = InverseProdOfTwoVariables._integrate_sf if tail else InverseProdOfTwoVariables._integrate_cdf
+                evaluations[self.c_solution] = integrate(self.c_solution, self.muX, self.sigmaX, self.muY, self.sigmaY,
+                                                         0.0 if tail else epsabs, epsrel,
+                                                         self.profile.n_sigmas, self.profile.limit)
+            value, err = evaluations[self.c_solution]
+            self.solution_error = abs(value - ((1.0 - self.target_p) if tail else self.target_p)) + err
+            # A integral que certifica a solução caiu nas tolerâncias de reserva (ver integrate_partition)
+            if getattr(evaluations[self.c_solution], "fallback", False):
+                self.solution_method = "quad_fallback"
         
-        # Validação Monte Carlo
-        X_samples = self.muX + self.sigmaX * np.random.randn(n_samples)
-        Y_samples = self.muY + self.sigmaY * np.random.randn(n_samples)
-        Z_samples = X_samples * Y_samples
-        self.mc_p = np.mean(Z_samples <= self.c_solution)
+        # Validação Monte Carlo (no modo auditoria do main ela roda só numa amostra das células)
+        if not validate:
+            # Sem resultado de uma chamada anterior: mc_p None marca "sem validação"
+            self.mc_p = self.mc_n_samples = self.mc_ci_halfwidth = None
+            return round(self.c_solution, 6)
+        rng = np.random.default_rng() if rng is None else rng
+        if estimator != "plain":
+            mc = reduced_variance_product_mc(self.muX, self.sigmaX, self.muY, self.sigmaY, self.c_solution,
+                                             estimator=estimator, n_samples=n_samples,
+                                             chunk_size=chunk_size or DEFAULT_CHUNK_SIZE, tol=mc_tol, dtype=dtype,
+                                             rng=rng, bank=bank)
+            self.mc_p = mc.prob
+            self.mc_n_samples = mc.n_samples
+        elif mc_tol is not None:
+            mc = sequential_product_mc(self.muX, self.sigmaX, self.muY, self.sigmaY, self.c_solution, tol=mc_tol,
+                                       max_samples=n_samples, batch_size=chunk_size or DEFAULT_CHUNK_SIZE, dtype=dtype,
+                                       rng=rng, bank=bank)
+            self.mc_p = mc.prob
+            self.mc_n_samples = mc.n_samples
+        elif chunk_size is not None or bank is not None:
+            self.mc_p = streaming_product_mc(self.muX, self.sigmaX, self.muY, self.sigmaY, self.c_solution,
+                                             n_samples=n_samples, chunk_size=chunk_size or DEFAULT_CHUNK_SIZE,
+                                             dtype=dtype, rng=rng, bank=bank).prob
+            self.mc_n_samples = n_samples
+        else:
+            X_samples = self.muX + self.sigmaX * rng.standard_normal(n_samples)
+            Y_samples = self.muY + self.sigmaY * rng.standard_normal(n_samples)
+            Z_samples = X_samples * Y_samples
+            self.mc_p = np.mean(Z_samples <= self.c_solution)
+            self.mc_n_samples = n_samples
+        self.mc_ci_halfwidth = mc.ci_halfwidth if estimator != "plain" else wilson_halfwidth(self.mc_p, self.mc_n_samples)
 
         return round(self.c_solution, 6)
 
+    def compute_solution_gradient(self) -> dict:
+        """
+        Derivadas da solução c em relação a muX, sigmaX, muY, sigmaY e target_p ("p"), pelo
+        teorema da função implícita em c_solution (ver cdfGradient): uma passada do
+        integrando em vez de um brentq por parâmetro
+        """
+        if self.c_solution is None:
+            raise RuntimeError("Execute solve_inverse_cdf() primeiro")
+        self.solution_gradient = quantile_gradient(self.c_solution, self.muX, self.sigmaX, self.muY, self.sigmaY)
+        return self.solution_gradient
+
     def print_verification_results(self) -> None:
         """Imprime resultados de verificação (público)"""
         if self.c_solution is None:
@@ -260,8 +483,13 @@ class InverseProdOfTwoVariables:
         print("## RESULTADOS DO CÁLCULO DE CDF INVERSA")
         print("="*60)
         print(f"Probabilidade alvo: {self.target_p:.6f}")
-        print(f"Valor c calculado: {self.c_solution:.6f}")
-        print(f"Verificação Monte Carlo: P(Z <= {self.c_solution:.6f}) = {self.mc_p:.6f}")
+        print(f"Valor c calculado: {self.c_solution:.6f} (|P(Z <= c) - alvo| <= {self.solution_error:.1e})")
+        if self.mc_p is None:
+            print("Verificação Monte Carlo: sem validação Monte Carlo (solve_inverse_cdf com validate=False)")
+            print("="*60)
+            return
+        print(f"Verificação Monte Carlo: P(Z <= {self.c_solution:.6f}) = {self.mc_p:.6f} "
+              f"(IC 95%: ±{self.mc_ci_halfwidth:.6f}, {self.mc_n_samples} amostras)")
         print(f"Erro absoluto: {np.abs(self.target_p - self.mc_p):.6f}")
         print(f"Erro relativo: {np.abs(self.target_p - self.mc_p)/self.target_p * 100:.4f}%")
         print("="*60)
@@ -279,16 +507,8 @@ class InverseProdOfTwoVariables:
 
         print("\nCalculando CDF para plotagem...")
         
-        # Calcula CDF com supressão de warnings
-        cdf_values = []
-        with warnings.catch_warnings():
-            warnings.filterwarnings('ignore', category=Warning)
-            cdf_values = Parallel(n_jobs=-1, verbose=0)(
-                delayed(InverseProdOfTwoVariables._compute_product_cdf_1d)(
-                    z, self.muX, self.sigmaX, self.muY, self.sigmaY
-                )
-                for z in z_range
-            )
+        # Curva inteira de uma vez (mesmos nós de quadratura para todos os z)
+        cdf_values = ProductCdfCurve(self.muX, self.sigmaX, self.muY, self.sigmaY, z_min=z_min, z_max=z_max)(z_range)
         
         plt.figure(figsize=(10, 6))
         plt.plot(z_range, cdf_values, 'b-', linewidth=2, label='CDF de Z=XY')
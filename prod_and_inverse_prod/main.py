@@ -1,22 +1,71 @@
 from inverseProdOfTwoVariables import InverseProdOfTwoVariables
 from prodOfTwoVariables import ProdOfNormalRVs
 from Tabela import Tabela, Parametros
+from sampleBank import get_bank, DEFAULT_BANK_SIZE
+from quantileSurface import get_surface
+from cdfCache import CDF_CACHE
+from closedFormProd import classify
+from statisticalAudit import (risk_reasons, select_audit, AuditRecord, AuditReport, EXACT_METHODS,
+                              DEFAULT_FRACTION)
 from Particoes_na_tabela import SUPLIERS_POSICOES, FACTORS_POSICOES, DISTRIBUTORS_POSICOES, RETAILERS_POSICOES
 import threading
 import os
+import numpy as np
 mux_parametros = threading.Lock()
 thread_semaphore = threading.Semaphore(800)
+# Erro máximo aceito do ponto de sela antes de cair no quad (meia unidade da 6a casa decimal)
+APPROX_TOL = 5e-7
+# Perfil de precisão do quad e do brentq: "fast", "standard" ou "reference" (ver precisionProfiles)
+PRECISION_PROFILE = "standard"
+# Monte Carlo em blocos: memória por thread limitada a alguns MB, independente de n_samples
+MC_CHUNK_SIZE = 65_536
+# Monte Carlo sequencial: para quando a meia-largura do IC 95% de P(Z <= c) fica abaixo disso
+# (ex.: 5e-4); None mantém o Monte Carlo de tamanho fixo (1M amostras) da coluna de erro
+MC_TOL = None
+# Estimador do Monte Carlo: "plain", "antithetic", "control" ou "sobol" (ver monteCarlo.ESTIMATORS);
+# "plain" é a amostragem simples de sempre
+MC_ESTIMATOR = "plain"
+# Semente raiz: cada célula recebe um SeedSequence filho fixo, então o resultado não depende
+# da ordem ou do número de threads
+MC_SEED = 20240601
+# Banco de normais em disco (sampleBank): gerado uma vez e lido por memória mapeada em todas as
+# células, threads e execuções. Vale para os estimadores "plain", "antithetic" e "control".
+USAR_BANCO_NORMAL = False
+MC_BANK_SIZE = DEFAULT_BANK_SIZE
+# True: cada simulação começa num ponto sorteado do banco; False: todas usam o mesmo trecho
+MC_BANK_ROTATE = True
+# Superfície de quantis pré-calculada (quantileSurface): a inversa (LB) parte do quantil tabelado e
+# só dá passos de polimento. O .npz vem com o repositório; sem ele a inversa parte do chute normal
+# (reconstrua com python quantileSurface.py)
+USAR_SUPERFICIE = True
+# Alvo da inversa (LB): P(XY <= LB) = ALVO_LB
+ALVO_LB = 0.98
+# Modo auditoria: LB e probabilidades saem para todas as células sem Monte Carlo; a validação
+# Monte Carlo roda numa amostra estratificada (AUDITORIA_FRACAO de cada matriz) mais as células
+# de risco (ver statisticalAudit), e o resumo vai para RELATORIO_AUDITORIA. Só as células
+# auditadas têm a coluna de erro preenchida; nas outras ela fica em branco. Desligado por padrão:
+# a planilha sai, como sempre, com o erro Monte Carlo de todas as células
+MODO_AUDITORIA = False
+AUDITORIA_FRACAO = DEFAULT_FRACTION
+RELATORIO_AUDITORIA = "relatorio_auditoria.txt"
+banco_normal = None
+# (id do Parametros, "LB" ou "PROB") -> (método numérico, p) para a auditoria
+diagnosticos = {}
 todas_threads = []
 
-def calculaLB_thread(parametro: Parametros, index: int):
+def calculaLB_thread(parametro: Parametros, index: int, seed: np.random.SeedSequence = None):
     try:
         solver = InverseProdOfTwoVariables(parametro.mux1, parametro.sigmax1, 
-                                         parametro.muy, parametro.sigmay)
-        c_solution = solver.solve_inverse_cdf()
+                                         parametro.muy, parametro.sigmay, target_p=ALVO_LB,
+                                         approx_tol=APPROX_TOL, profile=PRECISION_PROFILE)
+        c_solution = solver.solve_inverse_cdf(chunk_size=MC_CHUNK_SIZE, mc_tol=MC_TOL, estimator=MC_ESTIMATOR,
+                                              rng=np.random.default_rng(seed), bank=banco_normal,
+                                              validate=not MODO_AUDITORIA)
         
         # Modifica diretamente o objeto Parametros
         with mux_parametros:
             parametro.lw = c_solution
+            diagnosticos[id(parametro), "LB"] = (solver.solution_method, ALVO_LB)
             
     except Exception as e:
         print(f"✗ Erro thread LW {index}: {e} : muX={parametro.mux1}, sigX={parametro.sigmax1}, muY={parametro.muy}, sigY={parametro.sigmay}")
@@ -29,8 +78,10 @@ def calculaDESV_thread(parametro: Parametros, index: int):
         analyzer = ProdOfNormalRVs(muX=parametro.mux2,
                                    sigmaX=parametro.sigmax2,
                                    muY=parametro.muy,
-                                   sigmaY=parametro.sigmay)
-        std_dev = analyzer.solve_cdf()
+                                   sigmaY=parametro.sigmay,
+                                   approx_tol=APPROX_TOL, profile=PRECISION_PROFILE)
+        # Só o desvio teórico (forma fechada) é usado: o resultado preguiçoso não integra nem simula
+        std_dev = round(analyzer.lazy_result().theoretical_std, 6)
         # Modifica diretamente o objeto Parametros
         with mux_parametros:
             parametro.desv = std_dev
@@ -46,8 +97,9 @@ def calculoDESVArt_thread(parametro: Parametros, index: int):
                                        sigmaX=parametro.sigxart,
                                        muY=parametro.muy,
                                        sigmaY=parametro.sigyart,
-                                        c=(parametro.muxart * parametro.muy))
-        std_dev_art = analyzer_art.solve_cdf()
+                                        c=(parametro.muxart * parametro.muy),
+                                        approx_tol=APPROX_TOL, profile=PRECISION_PROFILE)
+        std_dev_art = round(analyzer_art.lazy_result().theoretical_std, 6)
         # Modifica diretamente o objeto Parametros
         with mux_parametros:
             parametro.desv_art = std_dev_art
@@ -57,28 +109,40 @@ def calculoDESVArt_thread(parametro: Parametros, index: int):
         with mux_parametros:
             parametro.lw = 0.0
 
-def calculaPROB_thread(parametro: Parametros, index: int):
+def calculaPROB_thread(parametro: Parametros, index: int, seed: np.random.SeedSequence = None):
     try:
         analyzer = ProdOfNormalRVs(muX=parametro.mux2,
                                    sigmaX=parametro.sigmax2,
                                    muY=parametro.muy,
                                    sigmaY=parametro.sigmay,
-                                   c=parametro.reorder)
+                                   c=parametro.reorder,
+                                   approx_tol=APPROX_TOL, profile=PRECISION_PROFILE)
         analyzer_art = ProdOfNormalRVs(muX=parametro.muxart,
                                       sigmaX=parametro.sigxart,
                                       muY=parametro.muy,
-                                      sigmaY=parametro.sigyart)
+                                      sigmaY=parametro.sigyart,
+                                      approx_tol=APPROX_TOL, profile=PRECISION_PROFILE)
         probart = analyzer_art.compute_product_cdf_1d(parametro.constart)
-        std_dev = analyzer.solve_cdf()
-        if parametro.reorder != 0:
-            probability = analyzer.compute_product_cdf_1d(parametro.reorder)
-            erro_percentual = analyzer.get_relative_error()
+        resultado = analyzer.lazy_result(chunk_size=MC_CHUNK_SIZE, mc_tol=MC_TOL, estimator=MC_ESTIMATOR,
+                                         rng=np.random.default_rng(seed), bank=banco_normal)
+        std_dev = round(resultado.theoretical_std, 6)
+        if parametro.reorder != 0 and MODO_AUDITORIA:
+            # Sem Monte Carlo aqui: a auditoria valida uma amostra das células depois e só elas
+            # recebem erro; nas outras a coluna fica em branco, sem o valor antigo da planilha
+            probability = resultado.numerical_cdf
+            erro_percentual = None
+        elif parametro.reorder != 0:
+            # Integração e Monte Carlo só rodam aqui, uma vez cada
+            probability = resultado.numerical_cdf
+            erro_percentual = resultado.relative_error
         else :
             probability = 0.0
             erro_percentual = 0.0
         
 
         with mux_parametros:
+            if parametro.reorder != 0:
+                diagnosticos[id(parametro), "PROB"] = (analyzer.numerical_method, probability)
             parametro.prob = probability
             parametro.probart = probart
             parametro.error = erro_percentual
@@ -93,8 +157,93 @@ def calculaPROB_thread(parametro: Parametros, index: int):
     finally:
         thread_semaphore.release()
 
+def metodoLote(mux: float, sigmax: float, muy: float, sigmay: float) -> str:
+    """Método registrado em diagnosticos para uma célula do lote: o tipo da forma fechada, se houver"""
+    forma_fechada = classify(mux, sigmax, muy, sigmay)
+    return "lote" if forma_fechada is None else forma_fechada.kind
+
+def calculaPROB_lote(parametros: list[Parametros]):
+    """Calcula prob, probart e desv de todas as células de uma vez com o motor vetorizado.
+    Não executa a validação Monte Carlo: a coluna de erro fica em branco (no modo auditoria,
+    a auditoria preenche a das células auditadas) em vez de manter o valor lido da planilha."""
+    def coluna(nome):
+        return np.array([float(getattr(p, nome)) for p in parametros])
+
+    muy = coluna("muy")
+    reorder = coluna("reorder")
+    prob = ProdOfNormalRVs.compute_product_cdf_batch(coluna("mux2"), coluna("sigmax2"), muy, coluna("sigmay"), reorder)
+    probart = ProdOfNormalRVs.compute_product_cdf_batch(coluna("muxart"), coluna("sigxart"), muy, coluna("sigyart"), coluna("constart"))
+    prob = np.where(reorder != 0, prob, 0.0)
+
+    for p, pr, pa in zip(parametros, prob, probart):
+        # Arredondadas como no caminho escalar (compute_product_cdf_1d)
+        p.prob = round(float(pr), 6)
+        p.probart = round(float(pa), 6)
+        if p.reorder != 0:
+            diagnosticos[id(p), "PROB"] = (metodoLote(p.mux2, p.sigmax2, p.muy, p.sigmay), p.prob)
+        p.error = None
+        p.desv = round(ProdOfNormalRVs(p.mux2, p.sigmax2, p.muy, p.sigmay).theoretical_std, 6)
+
+def calculaLB_lote(parametros: list[Parametros], sementes: list = None):
+    """Calcula lw, desv e desv_art de todas as células de uma vez com a inversa vetorizada.
+    Não executa a validação Monte Carlo; células que não convergem no lote passam pela inversa escalar,
+    com a semente da célula em sementes (a mesma do caminho por threads)."""
+    def coluna(nome):
+        return np.array([float(getattr(p, nome)) for p in parametros])
+
+    lote = InverseProdOfTwoVariables.solve_inverse_cdf_batch(coluna("mux1"), coluna("sigmax1"), coluna("muy"),
+                                                             coluna("sigmay"), target_p=ALVO_LB,
+                                                             profile=PRECISION_PROFILE)
+    for index, (p, c, convergiu) in enumerate(zip(parametros, lote.c, lote.converged)):
+        if convergiu:
+            p.lw = round(float(c), 6)
+            diagnosticos[id(p), "LB"] = (metodoLote(p.mux1, p.sigmax1, p.muy, p.sigmay), ALVO_LB)
+        else:
+            calculaLB_thread(p, index, None if sementes is None else sementes[index])
+        p.desv = round(ProdOfNormalRVs(p.mux2, p.sigmax2, p.muy, p.sigmay).theoretical_std, 6)
+        p.desv_art = round(ProdOfNormalRVs(p.muxart, p.sigxart, p.muy, p.sigyart).theoretical_std, 6)
+    print(f"LB em lote: {int(lote.converged.sum())}/{lote.c.size} células convergidas, "
+          f"{int(lote.iterations.max(initial=0))} avaliações no máximo")
+
+def auditaCelulas(tarefas: list, sementes: list) -> AuditReport:
+    """Modo auditoria: Monte Carlo só na amostra estratificada e nas células de risco (ver statisticalAudit)"""
+    candidatas = []
+    n_exatas = 0
+    for (nome_particao, j, i, param), (seed_lb, seed_prob) in zip(tarefas, sementes):
+        for tipo, seed in (("LB", seed_lb), ("PROB", seed_prob)):
+            if (id(param), tipo) not in diagnosticos:
+                continue
+            metodo, p = diagnosticos[id(param), tipo]
+            if metodo in EXACT_METHODS:
+                n_exatas += 1
+                continue
+            if tipo == "LB":
+                celula = (param.mux1, param.sigmax1, param.muy, param.sigmay, param.lw)
+            else:
+                celula = (param.mux2, param.sigmax2, param.muy, param.sigmay, param.reorder)
+            rotulo = f"{tipo} {nome_particao} #{j} linha {param.linha_salvar} coluna {param.coluna_salvar}"
+            candidatas.append((rotulo, f"{tipo} {nome_particao} #{j}", param, tipo, celula, p, metodo, seed))
+
+    amostra = select_audit([c[1] for c in candidatas], AUDITORIA_FRACAO, np.random.default_rng(MC_SEED))
+    relatorio = AuditReport(len(candidatas) + n_exatas, n_exatas)
+    for (rotulo, estrato, param, tipo, celula, p, metodo, seed), sorteada in zip(candidatas, amostra):
+        motivos = risk_reasons(p, *celula[:4], metodo)
+        if not (sorteada or motivos):
+            continue
+        # A mesma simulação que a célula teria fora do modo auditoria (mesma semente e estimador)
+        resultado = ProdOfNormalRVs(*celula[:4], c=celula[4], approx_tol=APPROX_TOL,
+                                    profile=PRECISION_PROFILE).lazy_result(
+            chunk_size=MC_CHUNK_SIZE, mc_tol=MC_TOL, estimator=MC_ESTIMATOR, rng=np.random.default_rng(seed),
+            bank=banco_normal)
+        relatorio.add(AuditRecord(rotulo, estrato, p, float(resultado.mc_prob), float(resultado.mc_ci_halfwidth),
+                                  bool(sorteada), motivos))
+        if tipo == "PROB":
+            param.error = resultado.relative_error
+    return relatorio
+
 if __name__ == "__main__":
     THREAD_MODE = True
+    BATCH_MODE = False  # LB e PROBABILIDADES vetorizadas, sem Monte Carlo por célula (coluna de erro em branco)
     CALCULAR_DEV_LW = True
     global COLUNA_INICIO
     # mude aqui e em Particoes_na_tabela.py o inicio da coluna
@@ -163,17 +312,40 @@ if __name__ == "__main__":
                 todos_parametros_validos.append((nome_particao, j, i, param))
 
     print(f"\n=== TOTAL: {len(todos_parametros_validos)} parâmetros válidos em {len(particoes)*NUM_TABELAS} matrizes ===")
+
+    # Um SeedSequence por célula, e dele um fluxo por cálculo com Monte Carlo (LB, PROB):
+    # threads não compartilham gerador e cada célula sempre recebe os mesmos fluxos
+    sementes = [tarefa.spawn(2) for tarefa in np.random.SeedSequence(MC_SEED).spawn(len(todos_parametros_validos))]
+
+    if USAR_BANCO_NORMAL and MC_ESTIMATOR != "sobol":
+        banco_normal = get_bank(MC_BANK_SIZE, rotate=MC_BANK_ROTATE)
+        print(f"Banco de normais: {banco_normal.path}")
+
+    InverseProdOfTwoVariables.use_surface = USAR_SUPERFICIE
+    if USAR_SUPERFICIE and CALCULAR_DEV_LW:
+        print("Carregando superfície de quantis...")
+        if get_surface() is None:
+            print("Superfície de quantis não encontrada (python quantileSurface.py): usando o chute normal")
     
-    # --- processamento (threads ou sequencial) ---
-    if THREAD_MODE:
+    # --- processamento (lote, threads ou sequencial) ---
+    if BATCH_MODE and CALCULAR_DEV_LW:
+        print("Calculando LB e DESV em lote...")
+        calculaLB_lote([param for _, _, _, param in todos_parametros_validos],
+                       [seed_lb for seed_lb, _ in sementes])
+
+    elif BATCH_MODE:
+        print("Calculando probabilidades em lote...")
+        calculaPROB_lote([param for _, _, _, param in todos_parametros_validos])
+
+    elif THREAD_MODE:
         if CALCULAR_DEV_LW :
             print("Iniciando threads de cálculo (LB e DESV)...")
 
-            for nome_particao, j, i, param in todos_parametros_validos:
+            for (nome_particao, j, i, param), (seed_lb, _) in zip(todos_parametros_validos, sementes):
                 # Thread LB
                 t1 = threading.Thread(
                     target=calculaLB_thread,
-                    args=(param, j * 1000 + i),
+                    args=(param, j * 1000 + i, seed_lb),
                     name=f"{nome_particao}_T{j}_P{i}_LB"
                 )
                 t1.start()
@@ -207,12 +379,12 @@ if __name__ == "__main__":
         else:
             print("Iniciando threads de probabilidade...")
             total = 0
-            for nome_particao, j, i, param in todos_parametros_validos:
+            for (nome_particao, j, i, param), (_, seed_prob) in zip(todos_parametros_validos, sementes):
                 thread_semaphore.acquire()
                 total +=1
                 t3 = threading.Thread(
                     target=calculaPROB_thread,
-                    args=(param, j * 1000 + i),
+                    args=(param, j * 1000 + i, seed_prob),
                     name=f"{nome_particao}_T{j}_P{i}_PROB"
                 )
                 t3.start()
@@ -225,10 +397,19 @@ if __name__ == "__main__":
 
     else:
         print("Executando cálculos sequencialmente...")
-        for nome_particao, j, i, param in todos_parametros_validos:
-            calculaLB_thread(param, j * 1000 + i)
+        for (nome_particao, j, i, param), (seed_lb, seed_prob) in zip(todos_parametros_validos, sementes):
+            calculaLB_thread(param, j * 1000 + i, seed_lb)
             calculaDESV_thread(param, j * 1000 + i)
-            calculaPROB_thread(param, j * 1000 + i)
+            calculaPROB_thread(param, j * 1000 + i, seed_prob)
+
+    print(f"Cache de integrais: {CDF_CACHE}")
+
+    if MODO_AUDITORIA:
+        print("Auditando uma amostra das células com Monte Carlo...")
+        relatorio = auditaCelulas(todos_parametros_validos, sementes)
+        relatorio.write(RELATORIO_AUDITORIA)
+        print(relatorio.summary())
+        print(f"Relatório da auditoria: {RELATORIO_AUDITORIA}")
 
     # --- salvar resultados ---
     print("\n=== SALVANDO RESULTADOS ===")
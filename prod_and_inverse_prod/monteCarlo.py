@@ -0,0 +1,315 @@
+"""
+Simulação Monte Carlo de Z = XY com memória constante.
+
+As amostras são geradas em blocos de tamanho fixo; a probabilidade P(Z <= c)
+e a média/variância de Z são acumuladas bloco a bloco (atualização de Welford
+na forma de Chan para blocos), então o pico de memória depende só de chunk_size.
+
+O modo sequencial para assim que a meia-largura do intervalo de confiança
+(Wilson) de P(Z <= c) fica abaixo da tolerância pedida.
+
+Estimadores com redução de variância (reduced_variance_product_mc):
+  - "antithetic": pares (zx, zy) e (-zx, -zy);
+  - "control": variável de controle Z - E[Z], com E[Z] = muX muY conhecida;
+  - "sobol": Sobol embaralhado (scipy.stats.qmc) levado à normal por ndtri,
+    com o erro estimado pela dispersão entre embaralhamentos independentes.
+
+Todas as funções aceitam rng (numpy.random.Generator); com o mesmo gerador o
+resultado é reproduzível bit a bit. Sem rng, cada chamada cria um gerador novo
+(nunca o estado global de np.random, que seria compartilhado entre threads).
+Com bank (sampleBank.NormalBank), os pares normais vêm do banco em disco e o
+rng só sorteia o deslocamento de leitura. Com sketch (empiricalDist.HistogramSketch),
+cada bloco de Z também alimenta o histograma, e o resultado carrega a distribuição
+empírica para consultas em outros limiares.
+"""
+import numpy as np
+from scipy.special import ndtri
+from scipy.stats import qmc, t as student_t
+
+DEFAULT_CHUNK_SIZE = 65_536
+ESTIMATORS = ("plain", "antithetic", "control", "sobol")
+
+
+class MonteCarloResult:
+    def __init__(self, prob: float, mean: float, variance: float, n_samples: int, ci_halfwidth: float = None,
+                 estimator: str = "plain", distribution=None):
+        self.prob = prob
+        self.mean = mean
+        self.variance = variance
+        self.std = np.sqrt(variance)
+        self.n_samples = n_samples
+        self.ci_halfwidth = ci_halfwidth
+        self.estimator = estimator
+        self.distribution = distribution
+
+    def __repr__(self):
+        return (f"MonteCarloResult(prob={self.prob}, mean={self.mean}, variance={self.variance}, "
+                f"n_samples={self.n_samples}, ci_halfwidth={self.ci_halfwidth}, estimator={self.estimator!r})")
+
+
+def wilson_halfwidth(p: float, n: int, confidence: float = 0.95) -> float:
+    """Meia-largura do intervalo de Wilson para uma proporção; não colapsa para zero com p perto de 0 ou 1"""
+    if n == 0:
+        return np.inf
+    z = ndtri(0.5 + confidence / 2)
+    return z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / (1 + z**2 / n)
+
+
+class _RunningMoments:
+    """Contagem de Z <= c e momentos de Z acumulados por bloco (Welford/Chan)"""
+
+    def __init__(self, sketch=None):
+        self.sketch = sketch
+        self.n = 0
+        self.hits = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, z_chunk: np.ndarray, c: float):
+        n_b = z_chunk.size
+        if n_b == 0:
+            return
+        # Estatísticas do bloco sempre em float64, mesmo com amostras float32
+        mean_b = float(np.mean(z_chunk, dtype=np.float64))
+        m2_b = float(np.sum((z_chunk - mean_b)**2, dtype=np.float64))
+
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta**2 * self.n * n_b / n
+        self.n = n
+        self.hits += int(np.count_nonzero(z_chunk <= c))
+        if self.sketch is not None:
+            self.sketch.update(z_chunk)
+
+    def wilson_halfwidth(self, confidence: float) -> float:
+        return wilson_halfwidth(self.hits / self.n if self.n else 0.0, self.n, confidence)
+
+    def result(self, ci_halfwidth: float = None) -> MonteCarloResult:
+        variance = self.m2 / self.n if self.n else np.nan
+        prob = self.hits / self.n if self.n else np.nan
+        return MonteCarloResult(prob, self.mean, variance, self.n, ci_halfwidth, distribution=self.sketch)
+
+
+class _RngSource:
+    """Pares normais padrão direto do gerador (mesma interface de sampleBank.BankCursor)"""
+
+    def __init__(self, rng: np.random.Generator):
+        self.rng = rng
+
+    def draw(self, size: int, dtype=np.float64) -> tuple:
+        return self.rng.standard_normal(size, dtype=dtype), self.rng.standard_normal(size, dtype=dtype)
+
+
+def _normal_source(rng, bank):
+    rng = np.random.default_rng() if rng is None else rng
+    return bank.cursor(rng) if bank is not None else _RngSource(rng)
+
+
+def _product_chunks(muX, sigmaX, muY, sigmaY, n_samples, chunk_size, dtype, source):
+    """Gera blocos de amostras de XY com no máximo chunk_size elementos"""
+    remaining = n_samples
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        # Operações in-place: no máximo dois vetores de tamanho chunk_size vivos
+        z, y = source.draw(size, dtype)
+        z *= sigmaX
+        z += muX
+        y *= sigmaY
+        y += muY
+        z *= y
+        yield z
+        remaining -= size
+
+
+def streaming_product_mc(
+    muX: float,
+    sigmaX: float,
+    muY: float,
+    sigmaY: float,
+    c: float,
+    n_samples: int = 1_000_000,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dtype=np.float64,
+    rng: np.random.Generator = None,
+    bank=None,
+    sketch=None
+) -> MonteCarloResult:
+    """
+    Estima P(XY <= c) e os momentos de XY sem materializar as n_samples amostras.
+    Com dtype=np.float32 as amostras ocupam metade da memória; os acumuladores seguem em float64.
+    """
+    acc = _RunningMoments(sketch)
+    source = _normal_source(rng, bank)
+    for z in _product_chunks(muX, sigmaX, muY, sigmaY, n_samples, chunk_size, dtype, source):
+        acc.update(z, c)
+    return acc.result()
+
+
+def sequential_product_mc(
+    muX: float,
+    sigmaX: float,
+    muY: float,
+    sigmaY: float,
+    c: float,
+    tol: float,
+    max_samples: int = 1_000_000,
+    batch_size: int = DEFAULT_CHUNK_SIZE,
+    confidence: float = 0.95,
+    dtype=np.float64,
+    rng: np.random.Generator = None,
+    bank=None,
+    sketch=None
+) -> MonteCarloResult:
+    """
+    Amostra em lotes até que a meia-largura do IC de P(XY <= c) fique <= tol,
+    ou até max_samples. O resultado informa n_samples usados e ci_halfwidth atingida.
+    """
+    acc = _RunningMoments(sketch)
+    halfwidth = np.inf
+    source = _normal_source(rng, bank)
+
+    for z in _product_chunks(muX, sigmaX, muY, sigmaY, max_samples, batch_size, dtype, source):
+        acc.update(z, c)
+        halfwidth = acc.wilson_halfwidth(confidence)
+        if halfwidth <= tol:
+            break
+
+    return acc.result(ci_halfwidth=halfwidth)
+
+
+class _PairSums:
+    """Somas de (a, b) por unidade amostral, para média e variância com variável de controle b"""
+
+    def __init__(self):
+        self.n = 0
+        self.sums = np.zeros(5)  # a, b, a^2, b^2, ab
+
+    def update(self, a: np.ndarray, b: np.ndarray):
+        a = a.astype(np.float64, copy=False)
+        b = b.astype(np.float64, copy=False)
+        self.n += a.size
+        self.sums += (a.sum(), b.sum(), a @ a, b @ b, a @ b)
+
+    def estimate(self, control: bool) -> tuple:
+        """(estimativa de E[a], variância por unidade)"""
+        mean_a, mean_b, m_aa, m_bb, m_ab = self.sums / self.n
+        var_a = max(m_aa - mean_a**2, 0.0)
+        if not control:
+            return mean_a, var_a
+        var_b = m_bb - mean_b**2
+        cov_ab = m_ab - mean_a * mean_b
+        if var_b <= 0:
+            return mean_a, var_a
+        # Coeficiente ótimo b* = cov(a, b) / var(b); E[b] = 0 por construção
+        return mean_a - cov_ab / var_b * mean_b, max(var_a - cov_ab**2 / var_b, 0.0)
+
+
+def _halfwidth(var_unit: float, n_units: int, confidence: float) -> float:
+    return ndtri(0.5 + confidence / 2) * np.sqrt(var_unit / n_units) if n_units else np.inf
+
+
+def _sobol_product_mc(muX, sigmaX, muY, sigmaY, c, n_samples, chunk_size, tol, confidence, n_scrambles, dtype, rng,
+                      sketch):
+    """Sobol embaralhado: n_scrambles sequências independentes avançam juntas, em blocos potência de 2"""
+    # Sementes inteiras tiradas de rng: passar o Generator faria o scipy derivar filhos
+    # do SeedSequence dele, e o resultado dependeria de quantos filhos já foram gerados
+    engines = [qmc.Sobol(d=2, scramble=True, seed=int(s)) for s in rng.integers(2**63, size=n_scrambles)]
+    block = 1 << max(int(np.log2(max(chunk_size // n_scrambles, 1))), 0)
+    hits = np.zeros(n_scrambles)
+    moments = _RunningMoments(sketch)
+    t_crit = student_t.ppf(0.5 + confidence / 2, n_scrambles - 1)
+    halfwidth = np.inf
+    n_per = 0
+
+    while (n_per + block) * n_scrambles <= max(n_samples, block * n_scrambles):
+        for r, engine in enumerate(engines):
+            u = np.clip(engine.random(block), 1e-16, 1.0 - 1e-16)
+            z = ndtri(u).astype(dtype, copy=False)
+            x = z[:, 0] * sigmaX + muX
+            y = z[:, 1] * sigmaY + muY
+            x *= y
+            hits[r] += np.count_nonzero(x <= c)
+            moments.update(x, c)
+        n_per += block
+
+        probs = hits / n_per
+        halfwidth = t_crit * np.std(probs, ddof=1) / np.sqrt(n_scrambles)
+        if tol is not None and halfwidth <= tol:
+            break
+
+    res = moments.result(ci_halfwidth=halfwidth)
+    res.prob = float(np.mean(hits / n_per))
+    res.estimator = "sobol"
+    return res
+
+
+def reduced_variance_product_mc(
+    muX: float,
+    sigmaX: float,
+    muY: float,
+    sigmaY: float,
+    c: float,
+    estimator: str = "antithetic",
+    n_samples: int = 1_000_000,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    tol: float = None,
+    confidence: float = 0.95,
+    n_scrambles: int = 16,
+    dtype=np.float64,
+    rng: np.random.Generator = None,
+    bank=None,
+    sketch=None
+) -> MonteCarloResult:
+    """
+    Estima P(XY <= c) com o estimador escolhido (ver ESTIMATORS), em blocos de memória constante.
+    ci_halfwidth vem do erro padrão do próprio estimador; com tol, para assim que ci_halfwidth <= tol
+    (n_samples é o teto). mean/variance continuam sendo os momentos empíricos das amostras de Z.
+    """
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"Estimador desconhecido: {estimator!r}. Opções: {ESTIMATORS}")
+    if estimator == "sobol":
+        if bank is not None:
+            raise ValueError("O estimador sobol gera seus próprios pontos e não usa o banco de amostras")
+        rng = np.random.default_rng() if rng is None else rng
+        return _sobol_product_mc(muX, sigmaX, muY, sigmaY, c, n_samples, chunk_size, tol, confidence,
+                                 n_scrambles, dtype, rng, sketch)
+
+    control = estimator == "control"
+    antithetic = estimator == "antithetic"
+    sums = _PairSums()
+    moments = _RunningMoments(sketch)
+    theoretical_mean = muX * muY
+    halfwidth = np.inf
+    remaining = n_samples
+    source = _normal_source(rng, bank)
+
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        if antithetic:
+            size = max(size // 2, 1)
+        zx, zy = source.draw(size, dtype)
+        z = (muX + sigmaX * zx) * (muY + sigmaY * zy)
+        moments.update(z, c)
+        hit = (z <= c).astype(np.float64)
+
+        if antithetic:
+            z_anti = (muX - sigmaX * zx) * (muY - sigmaY * zy)
+            moments.update(z_anti, c)
+            # A unidade amostral é o par: média das duas indicadoras
+            hit += z_anti <= c
+            hit *= 0.5
+            remaining -= 2 * size
+        else:
+            remaining -= size
+
+        sums.update(hit, z - theoretical_mean if control else np.zeros_like(hit))
+        prob, var_unit = sums.estimate(control)
+        halfwidth = _halfwidth(var_unit, sums.n, confidence)
+        if tol is not None and halfwidth <= tol:
+            break
+
+    res = moments.result(ci_halfwidth=halfwidth)
+    res.prob = float(min(max(prob, 0.0), 1.0))
+    res.estimator = estimator
+    return res
@@ -0,0 +1,76 @@
+"""
+Newton/Halley salvaguardado para a raiz da inversa.
+
+evaluate(x) devolve (r, dr, d2r, resolved): o resíduo, crescente em x, as duas
+primeiras derivadas e se |r| já está dentro do erro da avaliação (o sinal não
+se decide mais, então x é a raiz na precisão da integral). Com resolved, dr e
+d2r podem vir como nan, para quem chama não calcular a densidade à toa.
+
+Cada passo é o de Halley, h / (1 - r d2r / (2 dr^2)) com h = -r / dr o de Newton,
+quando o fator de correção fica em (1/2, 2], e o de Newton nos outros casos. O
+intervalo [lo, hi] com r(lo) < 0 < r(hi) acompanha as avaliações e é a guarda:
+um passo que sai dele vira bissecção; enquanto um dos lados não existe, um
+passo inválido (dr nulo ou não finito) ou maior que step_scale 2^k vira expansão
+de step_scale 2^k no sentido da raiz, com k crescendo a cada expansão. Para
+quando o passo fica abaixo de xtol + rtol |x| e devolve x mais esse passo.
+"""
+import math
+
+MAX_NEWTON = 50
+
+
+class RootResult:
+    """
+    x: raiz (o ponto avaliado, se ali o sinal já não se decide, ou o último passo, menor que a
+    tolerância); n_evals: avaliações de evaluate; converged
+    """
+
+    def __init__(self, x: float, n_evals: int, converged: bool):
+        self.x = x
+        self.n_evals = n_evals
+        self.converged = converged
+
+
+def halley_step(r: float, dr: float, d2r: float) -> float:
+    """Passo de Halley, ou de Newton quando a correção de Halley não ajuda; nan se dr não serve"""
+    if not (dr > 0 and math.isfinite(dr)):
+        return math.nan
+    newton = -r / dr
+    factor = 1.0 - 0.5 * r * d2r / (dr * dr)
+    if 0.5 <= factor < math.inf:
+        return newton / factor
+    return newton
+
+
+def safeguarded_halley(evaluate, x0: float, step_scale: float, xtol: float, rtol: float,
+                       maxiter: int = MAX_NEWTON) -> RootResult:
+    """Raiz de evaluate a partir de x0 (ver o docstring do módulo); converged=False se maxiter acabar"""
+    lo, hi = -math.inf, math.inf
+    expansion = step_scale
+    x = x0
+    for n_evals in range(1, maxiter + 1):
+        r, dr, d2r, resolved = evaluate(x)
+        if resolved or r == 0:
+            return RootResult(x, n_evals, True)
+        if r < 0:
+            lo = x
+        else:
+            hi = x
+
+        step = halley_step(r, dr, d2r)
+        new = x + step
+        bracketed = math.isfinite(lo) and math.isfinite(hi)
+        if not (lo < new < hi):
+            if bracketed:
+                new = 0.5 * (lo + hi)
+            else:
+                new = x + math.copysign(expansion, -r)
+                expansion *= 2.0
+        elif not bracketed and abs(step) > expansion:
+            new = x + math.copysign(expansion, step)
+            expansion *= 2.0
+
+        if abs(new - x) <= xtol + rtol * abs(x):
+            return RootResult(new, n_evals, True)
+        x = new
+    return RootResult(x, maxiter, False)
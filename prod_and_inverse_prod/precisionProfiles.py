@@ -0,0 +1,66 @@
+"""
+Perfis de precisão nomeados do núcleo de integração (integrate_partition + refine,
+ver quadBreakpoints) e da busca da raiz na inversa (Newton/Halley e brentq).
+
+ProdOfNormalRVs e InverseProdOfTwoVariables recebem profile= com um dos nomes de
+PROFILES (ou um PrecisionProfile próprio); todos os pontos de entrada usam o
+mesmo núcleo e só escolhem o perfil. Medidos com python benchmark.py profiles
+(CDF sem arredondar; inversa em p = 0.98), erro contra "reference":
+
+                 benchmark e planilha (32 células)    CV alto (6 células sintéticas)
+    perfil       CDF ms   |dF|     inv ms  |dc|/c     CDF ms   |dF|     inv ms  |dc|/c
+    fast         0.066    0.0e+00  0.40    9.2e-15    0.085    6.7e-13  0.56    2.8e-14
+    standard     0.067    0.0e+00  0.44    0.0e+00    0.111    3.3e-13  0.64    5.4e-13
+    reference    0.070    -        0.43    -          0.086    -        0.59    -
+
+"fast" para no segundo degrau de TOLERANCE_LADDER (epsabs 1e-8), com janela de
+8 sigmas, e a inversa para com rtol 1e-5. O degrau mais frouxo (epsabs 1e-6)
+não serve à inversa: partindo da superfície de quantis (ver quantileSurface),
+a cota de erro da CDF ali já cobre |F - p| no primeiro ponto e o Newton para sem
+polir (|dc|/c ~1e-5). "standard" é o comportamento de sempre: sobe os degraus
+até o critério de quem chama (arredondamento, sinal de F - p) se firmar.
+"reference" integra direto no degrau mais apertado, com janela e limite
+maiores, e serve para validar os outros. Na inversa, a superfície deixa
+"reference" tão rápido quanto os outros: o Newton parte perto da raiz e a
+certificação é uma integral só. Nas células da planilha (Y com CV baixo) a
+integral já converge no primeiro passo e os três custam quase o mesmo; a
+diferença de custo aparece nas células de CV alto.
+"""
+from quadBreakpoints import TOLERANCE_LADDER
+
+
+class PrecisionProfile:
+    """
+    ladder: degraus (epsabs, epsrel) do refine; n_sigmas: meia largura da janela de X no
+    quad; limit: subintervalos do quad por trecho; xtol, rtol: tolerâncias em c do Newton/Halley
+    e do brentq
+    """
+
+    def __init__(self, name: str, ladder: tuple, n_sigmas: float, limit: int, xtol: float, rtol: float):
+        self.name = name
+        self.ladder = ladder
+        self.n_sigmas = n_sigmas
+        self.limit = limit
+        self.xtol = xtol
+        self.rtol = rtol
+
+    def __repr__(self) -> str:
+        return (f"PrecisionProfile({self.name!r}, ladder={self.ladder}, n_sigmas={self.n_sigmas}, "
+                f"limit={self.limit}, xtol={self.xtol}, rtol={self.rtol})")
+
+
+PROFILES = {
+    "fast": PrecisionProfile("fast", TOLERANCE_LADDER[1:2], n_sigmas=8.0, limit=50, xtol=1e-6, rtol=1e-5),
+    "standard": PrecisionProfile("standard", TOLERANCE_LADDER, n_sigmas=12.0, limit=200, xtol=1e-8, rtol=1e-6),
+    "reference": PrecisionProfile("reference", TOLERANCE_LADDER[-1:], n_sigmas=14.0, limit=500, xtol=1e-12, rtol=1e-12),
+}
+DEFAULT_PROFILE = "standard"
+
+
+def get_profile(profile) -> PrecisionProfile:
+    """PrecisionProfile pelo nome (ou o próprio, se já for um)"""
+    if isinstance(profile, PrecisionProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"Perfil de precisão desconhecido: {profile!r}. Opções: {tuple(PROFILES)}")
+    return PROFILES[profile]
@@ -1,9 +1,29 @@
 import numpy as np
-from scipy.stats import norm, gaussian_kde
-from scipy.integrate import quad
+from functools import cached_property
+from scipy.stats import norm
 import matplotlib.pyplot as plt
+from batchProdCdf import compute_product_cdf_batch as _cdf_batch
+from numbaIntegrand import integrand_llc
+from saddlepointProd import saddlepoint_cdf
+from cdfCurve import ProductCdfCurve, DEFAULT_N_POINTS, GRID_N_SIGMAS
+from sampleBank import NormalBank
+from empiricalDist import HistogramSketch, SortedSample
+from binnedKde import BinnedKde
+from closedFormProd import classify
+from cosProd import CosSeries, ENGINES, DEFAULT_N_TERMS
+from cdfGradient import product_cdf_gradient
+from quadBreakpoints import orient, integrate_partition, refine, rounding_settled, PDF_MIN
+from precisionProfiles import get_profile, DEFAULT_PROFILE
+from cdfCache import CDF_CACHE, integral_key
+from monteCarlo import (streaming_product_mc, sequential_product_mc, reduced_variance_product_mc,
+                        wilson_halfwidth, DEFAULT_CHUNK_SIZE)
 
 class ProdOfNormalRVs:
+
+    # Usa o integrando compilado (numba) no quad quando disponível
+    use_numba: bool = integrand_llc is not None
+    # Com engine="cos", a série COS só é aceita se a estimativa de erro for <= cos_tol; senão, quad
+    cos_tol: float = 1e-8
     
     def __init__(
         self,
@@ -11,7 +31,10 @@ class ProdOfNormalRVs:
         sigmaX: float,
         muY: float,
         sigmaY: float,
-        c: float = None
+        c: float = None,
+        approx_tol: float = None,
+        engine: str = "quad",
+        profile: str = DEFAULT_PROFILE
     ):
         self.muX = muX      
         self.sigmaX = sigmaX    
@@ -23,82 +46,155 @@ class ProdOfNormalRVs:
         else:
             self.c = c 
 
+        # Se definido, tenta o ponto de sela antes do quad e aceita quando o erro estimado <= approx_tol
+        self.approx_tol = approx_tol
+        # "quad" (integração adaptativa) ou "cos" (série de cossenos, ver cosProd)
+        if engine not in ENGINES:
+            raise ValueError(f"Motor desconhecido: {engine!r}. Opções: {ENGINES}")
+        self.engine = engine
+        # Tolerâncias, janela e limite do quad (ver precisionProfiles)
+        self.profile = get_profile(profile)
+        # Células degeneradas (sigma = 0, mu = 0) têm resposta exata e dispensam quad e Monte Carlo
+        self.closed_form = classify(muX, sigmaX, muY, sigmaY)
+
         self.theoretical_mean = muX * muY
         self.theoretical_variance = (muX**2 * sigmaY**2) + (muY**2 * sigmaX**2) + (sigmaX**2 * sigmaY**2)
         self.theoretical_std = np.sqrt(self.theoretical_variance)
         
         self.mc_result = None
+        self.mc_n_samples = None
+        self.mc_ci_halfwidth = None
         self.numerical_result = None
+        self.numerical_error = None
+        self.numerical_method = None
+        self.numerical_gradient = None
         self.Z_samples = None
         self.empirical_mean = None
         self.empirical_variance = None
         self.empirical_std = None
+        self._cdf_curve = None
+        self.empirical = None
 
-    def _integrand(self, x: float, c_val: float) -> float:
+    @staticmethod
+    def _integrand(x: float, c_val: float, muX: float, sigmaX: float, muY: float, sigmaY: float) -> float:
     
         if np.abs(x) < 1e-12:
             return 0.0
         
-        pdf_x = norm.pdf(x, loc=self.muX, scale=self.sigmaX)
+        pdf_x = norm.pdf(x, loc=muX, scale=sigmaX)
         
-        if pdf_x < 1e-100:
+        if pdf_x < PDF_MIN:
             return 0.0
 
         if x > 0:
-            prob_y = norm.cdf(c_val / x, loc=self.muY, scale=self.sigmaY)
+            prob_y = norm.cdf(c_val / x, loc=muY, scale=sigmaY)
         else:
-            prob_y = 1 - norm.cdf(c_val / x, loc=self.muY, scale=self.sigmaY)
+            prob_y = norm.sf(c_val / x, loc=muY, scale=sigmaY)
 
         return prob_y * pdf_x
 
     def compute_product_cdf_1d(self, c_val: float) -> float:     
-        n_sigmas = 12
-        x_min = self.muX - n_sigmas * self.sigmaX
-        x_max = self.muX + n_sigmas * self.sigmaX
-        
-        if x_max - x_min < 1e-6:
-            x_min = self.muX - 1.0
-            x_max = self.muX + 1.0
-
-        res = 0.0
-        
-        # Calcula a intersecção do intervalo [x_min, x_max] com [-inf, -epsilon]
-        neg_lower = x_min
-        neg_upper = min(x_max, -1e-12)
-        
-        if neg_lower < neg_upper:
-            part1, _ = quad(
-                self._integrand, neg_lower, neg_upper, args=(c_val,),
-                limit=200, epsabs=1e-10, epsrel=1e-8
-            )
-            res += part1
-
-        # Calcula a intersecção do intervalo [x_min, x_max] com [+epsilon, +inf]
-        pos_lower = max(x_min, 1e-12)
-        pos_upper = x_max
-        
-        if pos_lower < pos_upper:
-            part2, _ = quad(
-                self._integrand, pos_lower, pos_upper, args=(c_val,),
-                limit=200, epsabs=1e-10, epsrel=1e-8
-            )
-            res += part2
-
-        self.numerical_result = res
+        if self.closed_form is not None:
+            self.numerical_result = float(self.closed_form.cdf(c_val))
+            self.numerical_error = self.closed_form.error
+            self.numerical_method = self.closed_form.kind
+            return round(self.numerical_result, 6)
+
+        if self.approx_tol is not None:
+            approx, approx_err = saddlepoint_cdf(c_val, self.muX, self.sigmaX, self.muY, self.sigmaY)
+            # Além da tolerância, a cota não pode mudar a 6a casa (o valor sai arredondado, como no quad)
+            if approx_err <= self.approx_tol and rounding_settled(6)(approx, approx_err):
+                self.numerical_result = approx
+                self.numerical_error = approx_err
+                self.numerical_method = "saddlepoint"
+                return round(self.numerical_result, 6)
+
+        if self.engine == "cos":
+            value, err = CosSeries(self.muX, self.sigmaX, self.muY, self.sigmaY).cdf_with_error(c_val)
+            if err <= self.cos_tol:
+                self.numerical_result = float(value)
+                self.numerical_error = float(err)
+                self.numerical_method = "cos"
+                return round(self.numerical_result, 6)
+
+        # Integra sobre a variável de maior CV; intervalos em que P(Y <= c/x) é constante
+        # entram em forma fechada e o quad só vê a transição
+        muX, sigmaX, muY, sigmaY = orient(self.muX, self.sigmaX, self.muY, self.sigmaY)
+        if self.use_numba:
+            integrand = integrand_llc
+            args = (c_val, muX, sigmaX, muY, sigmaY, PDF_MIN)
+        else:
+            integrand = self._integrand
+            args = (c_val, muX, sigmaX, muY, sigmaY)
+
+        # Só aperta as tolerâncias se o erro puder mudar a 6a casa decimal; degraus com epsabs
+        # acima de meia unidade da 6a casa nunca a garantem e são pulados, salvo se forem os únicos.
+        # Cada degrau passa por CDF_CACHE (ver cdfCache), compartilhado com a inversa
+        profile = self.profile
+        ladder = [rung for rung in profile.ladder if rung[0] < 5e-7] or profile.ladder
+        result = refine(
+            lambda epsabs, epsrel: CDF_CACHE.get_or_compute(
+                integral_key(c_val, muX, sigmaX, muY, sigmaY, epsabs, epsrel, profile.n_sigmas, profile.limit),
+                lambda: integrate_partition(c_val, muX, sigmaX, muY, sigmaY, integrand, args, args,
+                                            epsabs, epsrel, n_sigmas=profile.n_sigmas, limit=profile.limit)
+            ),
+            rounding_settled(6), ladder=ladder
+        )
+
+        self.numerical_result, self.numerical_error = result
+        # "quad_fallback": algum trecho só passou com as tolerâncias de reserva do integrate_partition
+        self.numerical_method = "quad_fallback" if getattr(result, "fallback", False) else "quad"
         return round(self.numerical_result, 6)
 
-    def solve_cdf(self, n_samples=1_000_000) -> float:
-
-        X_samples = np.random.normal(self.muX, self.sigmaX, n_samples)
-        Y_samples = np.random.normal(self.muY, self.sigmaY, n_samples)
-        self.Z_samples = X_samples * Y_samples
-        
-        self.mc_result = np.mean(self.Z_samples <= self.c)
-
-        # Momentos empíricos
-        self.empirical_mean = np.mean(self.Z_samples)
-        self.empirical_variance = np.var(self.Z_samples)
-        self.empirical_std = np.std(self.Z_samples)
+    def compute_product_cdf_gradient(self, c_val: float = None) -> dict:
+        """
+        Derivadas de P(Z <= c) em relação a c, muX, sigmaX, muY e sigmaY (ver cdfGradient),
+        numa única passada do integrando; c padrão é self.c
+        """
+        c_val = self.c if c_val is None else c_val
+        _, self.numerical_gradient, _ = product_cdf_gradient(c_val, self.muX, self.sigmaX, self.muY, self.sigmaY)
+        return self.numerical_gradient
+
+    @staticmethod
+    def compute_product_cdf_batch(muX, sigmaX, muY, sigmaY, c, n_nodes: int = 128) -> np.ndarray:
+        """Versão vetorizada de compute_product_cdf_1d: recebe arrays de parâmetros e limiares"""
+        return np.round(_cdf_batch(muX, sigmaX, muY, sigmaY, c, n_nodes=n_nodes), 6)
+
+    @staticmethod
+    def compute_product_cdf_cos(muX, sigmaX, muY, sigmaY, c, n_terms: int = DEFAULT_N_TERMS) -> np.ndarray:
+        """Como compute_product_cdf_batch, pela série COS (um valor de c por célula, ou vários num eixo extra)"""
+        return np.round(CosSeries(muX, sigmaX, muY, sigmaY, n_terms=n_terms).cdf(c), 6)
+
+    def cdf_curve(self, n_points: int = DEFAULT_N_POINTS) -> ProductCdfCurve:
+        """CDF inteira tabelada uma vez (custo ~ uma integral) e reaproveitada pelas consultas seguintes"""
+        if self._cdf_curve is None:
+            half = GRID_N_SIGMAS * self.theoretical_std
+            self._cdf_curve = ProductCdfCurve(
+                self.muX, self.sigmaX, self.muY, self.sigmaY,
+                z_min=min(self.theoretical_mean - half, self.c), z_max=max(self.theoretical_mean + half, self.c),
+                n_points=n_points
+            )
+        return self._cdf_curve
+
+    def compute_product_cdf_many(self, c_values) -> np.ndarray:
+        """P(Z <= c) para vários limiares pela curva tabelada, arredondada como compute_product_cdf_1d"""
+        return np.round(self.cdf_curve()(c_values), 6)
+
+    def solve_cdf(self, n_samples=1_000_000, chunk_size: int = None, dtype=np.float64, mc_tol: float = None,
+                  estimator: str = "plain", rng: np.random.Generator = None,
+                  bank: NormalBank = None) -> float:
+        """
+        Simulação Monte Carlo + integração numérica.
+        Com chunk_size, amostra em blocos com memória constante e não guarda Z_samples
+        (plot_cdfs fica indisponível); dtype=np.float32 reduz ainda mais a memória.
+        Com mc_tol, amostra em lotes e para quando a meia-largura do IC 95% de P(Z <= c)
+        fica <= mc_tol; n_samples passa a ser o teto.
+        estimator escolhe "antithetic", "control" ou "sobol" (ver monteCarlo.ESTIMATORS) no lugar
+        das amostras simples; também não guarda Z_samples.
+        rng (numpy.random.Generator) torna a simulação reproduzível; sem ele, usa um gerador novo.
+        Com bank (sampleBank.NormalBank), os pares normais vêm do banco compartilhado em vez do rng.
+        """
+        self._run_monte_carlo(n_samples, chunk_size, dtype, mc_tol, estimator, rng, bank)
 
         # Garante que o numérico seja calculado
         if self.numerical_result is None:
@@ -106,6 +202,86 @@ class ProdOfNormalRVs:
             
         return round(self.theoretical_std, 6)
 
+    def lazy_result(self, n_samples=1_000_000, chunk_size: int = None, dtype=np.float64, mc_tol: float = None,
+                    estimator: str = "plain", rng: np.random.Generator = None,
+                    bank: NormalBank = None) -> "LazyProdResult":
+        """
+        Resultado preguiçoso: cada saída só é calculada no primeiro acesso e fica em cache.
+        Os argumentos configuram o Monte Carlo, como em solve_cdf.
+        """
+        return LazyProdResult(self, dict(n_samples=n_samples, chunk_size=chunk_size, dtype=dtype,
+                                         mc_tol=mc_tol, estimator=estimator, rng=rng, bank=bank))
+
+    def _run_monte_carlo(self, n_samples, chunk_size, dtype, mc_tol, estimator, rng, bank):
+        """Parte Monte Carlo de solve_cdf: preenche mc_result, mc_ci_halfwidth e os momentos empíricos"""
+        rng = np.random.default_rng() if rng is None else rng
+        self.empirical = None
+        if self.closed_form is not None:
+            # Nada a validar: a "simulação" devolve a probabilidade e os momentos exatos
+            self.Z_samples = None
+            self.mc_result = float(self.closed_form.cdf(self.c))
+            self.mc_n_samples = 0
+            self.mc_ci_halfwidth = 0.0
+            self.empirical_mean = self.theoretical_mean
+            self.empirical_variance = self.theoretical_variance
+            self.empirical_std = self.theoretical_std
+            return
+
+        if estimator != "plain" or mc_tol is not None or chunk_size is not None or bank is not None:
+            # O histograma é preenchido durante a simulação; c tem contagem exata
+            sketch = HistogramSketch.around(self.theoretical_mean, self.theoretical_std, exact_thresholds=[self.c])
+            if estimator != "plain":
+                mc = reduced_variance_product_mc(self.muX, self.sigmaX, self.muY, self.sigmaY, self.c,
+                                                 estimator=estimator, n_samples=n_samples,
+                                                 chunk_size=chunk_size or DEFAULT_CHUNK_SIZE, tol=mc_tol, dtype=dtype,
+                                                 rng=rng, bank=bank, sketch=sketch)
+            elif mc_tol is not None:
+                mc = sequential_product_mc(self.muX, self.sigmaX, self.muY, self.sigmaY, self.c, tol=mc_tol,
+                                           max_samples=n_samples, batch_size=chunk_size or DEFAULT_CHUNK_SIZE, dtype=dtype,
+                                           rng=rng, bank=bank, sketch=sketch)
+            else:
+                mc = streaming_product_mc(self.muX, self.sigmaX, self.muY, self.sigmaY, self.c,
+                                          n_samples=n_samples, chunk_size=chunk_size or DEFAULT_CHUNK_SIZE, dtype=dtype,
+                                          rng=rng, bank=bank, sketch=sketch)
+            self.Z_samples = None
+            self.mc_result = mc.prob
+            self.mc_n_samples = mc.n_samples
+            self.empirical_mean = mc.mean
+            self.empirical_variance = mc.variance
+            self.empirical_std = mc.std
+            self.mc_ci_halfwidth = mc.ci_halfwidth
+            self.empirical = mc.distribution
+        else:
+            X_samples = rng.normal(self.muX, self.sigmaX, n_samples)
+            Y_samples = rng.normal(self.muY, self.sigmaY, n_samples)
+            self.Z_samples = X_samples * Y_samples
+
+            self.mc_result = np.mean(self.Z_samples <= self.c)
+            self.mc_n_samples = n_samples
+
+            # Momentos empíricos
+            self.empirical_mean = np.mean(self.Z_samples)
+            self.empirical_variance = np.var(self.Z_samples)
+            self.empirical_std = np.std(self.Z_samples)
+
+        if estimator == "plain":
+            self.mc_ci_halfwidth = wilson_halfwidth(self.mc_result, self.mc_n_samples)
+
+    def empirical_distribution(self, exact: bool = False):
+        """
+        Distribuição empírica do último Monte Carlo, montada uma vez e reaproveitada:
+        cdf(c) e quantile(p) em O(log n) por consulta. Com amostras completas (Z_samples),
+        usa um histograma em O(n), ou a amostra ordenada se exact=True.
+        """
+        if self.Z_samples is not None:
+            if exact and not isinstance(self.empirical, SortedSample):
+                self.empirical = SortedSample(self.Z_samples)
+            elif self.empirical is None:
+                self.empirical = HistogramSketch.around(self.theoretical_mean, self.theoretical_std,
+                                                        exact_thresholds=[self.c])
+                self.empirical.update(self.Z_samples)
+        return self.empirical
+
     def get_relative_error(self) -> float:
         
             if self.numerical_result is None or self.mc_result is None:
@@ -121,7 +297,7 @@ class ProdOfNormalRVs:
             return round(resultado, 3)
             
     def _print_verification_results(self):
-        if self.Z_samples is None:
+        if self.mc_result is None:
             print("Resultados de Monte Carlo não disponíveis. Execute solve_cdf() primeiro.")
             return
 
@@ -156,7 +332,8 @@ class ProdOfNormalRVs:
 
         print('## RESULTADOS DE PROBABILIDADE P(XY <= c)')
         print(f' Integração Numérica (c={self.c:.2f}): {self.numerical_result:.6f}')
-        print(f' Simulação Monte Carlo (c={self.c:.2f}): {self.mc_result:.6f}')
+        print(f' Simulação Monte Carlo (c={self.c:.2f}): {self.mc_result:.6f} '
+              f'(IC 95%: ±{self.mc_ci_halfwidth:.6f}, {self.mc_n_samples} amostras)')
         
         abs_diff = np.abs(self.numerical_result - self.mc_result)
         print(f' Diferença Absoluta: {abs_diff:.6f}')
@@ -170,7 +347,7 @@ class ProdOfNormalRVs:
 
 
     def plot_cdfs(self):
-        if self.Z_samples is None:
+        if self.Z_samples is None and self.empirical is None:
             print("ERRO: Execute solve_cdf() primeiro.")
             return
 
@@ -184,13 +361,15 @@ class ProdOfNormalRVs:
 
         print("\nCalculando integral para curva CDF")
         
-        cdf_integration = [self.compute_product_cdf_1d(z) for z in z_range] 
-        cdf_integration = np.array(cdf_integration)
+        cdf_integration = self.cdf_curve()(z_range)
 
-        sorted_samples = np.sort(self.Z_samples)
-        cdf_empirical = np.searchsorted(sorted_samples, z_range, side='right') / len(sorted_samples)
+        cdf_empirical = self.empirical_distribution().cdf(z_range)
         
-        kde = gaussian_kde(self.Z_samples)
+        # KDE binado (FFT): com Z guardado usa a amostra inteira, senão as contagens do sketch
+        if self.Z_samples is not None:
+            kde = BinnedKde(self.Z_samples)
+        else:
+            kde = BinnedKde.from_sketch(self.empirical)
         pdf_empirical_kde = kde.evaluate(z_range)
         pdf_values_normal = norm.pdf(z_range, loc=self.theoretical_mean, scale=self.theoretical_std)
 
@@ -211,16 +390,6 @@ class ProdOfNormalRVs:
         plt.ylim([-0.05, 1.05])
         plt.show()
 
-        
-        # Figura 2: PDF
-        plt.figure(figsize=(8, 6))
-        plt.plot(z_range, pdf_values, 'b-', linewidth=2, label='Aprox. Normal Teórica')
-        plt.plot(z_range, pdf_empirical_kde, 'm:', linewidth=1.5, label='Empírica (KDE)')
-        plt.axvline(x=c, color='r', linestyle='--', linewidth=2, label=f'c = {c:.2f}')
-        plt.axvline(x=self.theoretical_mean, color='g', linestyle='--', linewidth=1.5,
-                   label='Média Teórica')
-        plt.axvline(x=self.empirical_mean, color='c', linestyle='--', linewidth=1.5,
-                   label='Média Empírica')
 
 
         # ---  PDF ---
@@ -246,4 +415,83 @@ class ProdOfNormalRVs:
         plt.title('Erro Absoluto (Integração vs Monte Carlo)')
         plt.grid(True, alpha=0.3)
         plt.xlim([z_min_auto, z_max_auto])
-        plt.show()
\ No newline at end of file
+        plt.show()
+
+
+class LazyProdResult:
+    """
+    Saídas de ProdOfNormalRVs calculadas sob demanda (ver ProdOfNormalRVs.lazy_result).
+
+    Momentos teóricos são forma fechada; numerical_cdf roda a integração (ou o ponto de sela);
+    mc_prob, mc_ci_halfwidth e os momentos empíricos disparam uma única simulação;
+    relative_error precisa das duas. Nada é recalculado depois do primeiro acesso.
+    """
+
+    def __init__(self, analyzer: ProdOfNormalRVs, mc_options: dict):
+        self._analyzer = analyzer
+        self._mc_options = mc_options
+
+    @property
+    def theoretical_mean(self) -> float:
+        return self._analyzer.theoretical_mean
+
+    @property
+    def theoretical_variance(self) -> float:
+        return self._analyzer.theoretical_variance
+
+    @property
+    def theoretical_std(self) -> float:
+        return self._analyzer.theoretical_std
+
+    @cached_property
+    def numerical_cdf(self) -> float:
+        """P(Z <= c) arredondada em 6 casas, como em compute_product_cdf_1d"""
+        return self._analyzer.compute_product_cdf_1d(self._analyzer.c)
+
+    @property
+    def numerical_error(self) -> float:
+        """Cota de erro de numerical_cdf antes do arredondamento"""
+        self.numerical_cdf
+        return self._analyzer.numerical_error
+
+    @cached_property
+    def numerical_gradient(self) -> dict:
+        """Derivadas de P(Z <= c) nos parâmetros, como em compute_product_cdf_gradient"""
+        return self._analyzer.compute_product_cdf_gradient()
+
+    @cached_property
+    def _monte_carlo(self) -> ProdOfNormalRVs:
+        self._analyzer._run_monte_carlo(**self._mc_options)
+        return self._analyzer
+
+    @property
+    def mc_prob(self) -> float:
+        return self._monte_carlo.mc_result
+
+    @property
+    def mc_ci_halfwidth(self) -> float:
+        return self._monte_carlo.mc_ci_halfwidth
+
+    @property
+    def empirical_mean(self) -> float:
+        return self._monte_carlo.empirical_mean
+
+    @property
+    def empirical_variance(self) -> float:
+        return self._monte_carlo.empirical_variance
+
+    @property
+    def empirical_std(self) -> float:
+        return self._monte_carlo.empirical_std
+
+    @property
+    def empirical(self):
+        """Distribuição empírica (cdf/quantile) da mesma simulação"""
+        return self._monte_carlo.empirical_distribution()
+
+    @cached_property
+    def relative_error(self) -> float:
+        """Erro relativo (%) entre a integração e o Monte Carlo, como em get_relative_error"""
+        self.numerical_cdf
+        self._monte_carlo
+        return self._analyzer.get_relative_error()
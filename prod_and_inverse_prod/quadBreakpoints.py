@@ -0,0 +1,247 @@
+"""
+Partição do eixo x para o quad de P(XY <= c) = integral de f_X(x) g(x) dx, com
+g(x) = P(Y <= c/x) para x > 0 e P(Y > c/x) para x < 0.
+
+g só varia onde c/x está a menos de BAND_N_SIGMAS sigmaY de muY, ou seja entre
+os pontos x = c / (muY +- BAND_N_SIGMAS sigmaY), que saem em forma fechada.
+Entre dois desses pontos (e o zero) g é constante: 0 ou 1, com erro menor que
+Phi(-BAND_N_SIGMAS), ou exatamente Phi(-muY/sigmaY) quando c = 0. A
+contribuição desses intervalos é g vezes a massa de X no intervalo, pela CDF
+normal, inclusive nas caudas infinitas.
+
+Só sobram para o quad os trechos em que g varia, cortados na janela
+muX +- n_sigmas sigmaX. Vão como `points` muX, os joelhos de g em
+x = c / (muY + k sigmaY) (KNEE_LEVELS; k = 0 é o meio da transição) e, quando
+muY +- BAND_N_SIGMAS sigmaY tem sinais opostos, as décadas |c| / sigmaY 10^j:
+ali g se aproxima do limite como |c| / (sigmaY |x|) até a borda da janela.
+Com c perto de zero, sem esses pontos a transição (largura ~|c| / sigmaY) some
+entre os nós do quad e a estimativa de erro deixa de ser cota. Nenhum trecho
+encosta em x = 0, onde c/x diverge e g é plano.
+
+Como P(XY <= c) é simétrica em X e Y, orient põe a variável de menor CV dentro
+de g: a faixa de transição fica estreita e, com CV abaixo de 1/BAND_N_SIGMAS, não
+contém o zero, então sobra uma única integral. (O motor vetorizado faz o
+contrário, porque lá não há parte em forma fechada e a esperança sobre a
+variável de menor CV é a mais suave para Gauss-Hermite.)
+
+integrate_partition devolve o valor junto com uma cota de erro: as estimativas
+do quad mais o erro da parte em forma fechada. refine usa essa cota para
+apertar as tolerâncias só quando preciso: começa no degrau mais frouxo de
+TOLERANCE_LADDER e sobe enquanto o erro puder mudar a decisão de quem chama
+(arredondamento na 6a casa, sinal de F(c) - p no brentq). O resultado é um
+PartitionResult: desempacota como (valor, erro) e marca em fallback se algum
+trecho só passou com as tolerâncias de reserva.
+
+integrate_density integra a densidade de XY (e a derivada dela em c) nos
+mesmos trechos: nos intervalos planos g não depende de c e a contribuição é
+nula, então a densidade sai só dos trechos que já vão para o quad.
+"""
+import math
+import warnings
+from scipy.integrate import quad
+from scipy.special import ndtr
+
+BAND_N_SIGMAS = 9.0
+# Corte do integrando (pdf_min do integrand_llc e dos integrandos Python): pontos com f_X(x) abaixo
+# disso valem 0. Um só valor para as duas classes, que dividem as integrais em CDF_CACHE
+PDF_MIN = 1e-300
+# Degraus (epsabs, epsrel) do controle adaptativo, do mais frouxo ao mais apertado
+TOLERANCE_LADDER = ((1e-6, 1e-4), (1e-8, 1e-6), (1e-10, 1e-8), (1e-12, 1e-10))
+# Joelhos de g em x = c / (muY + k sigmaY): com c perto de zero a transição fica numa faixa de
+# largura ~|c| / sigmaY, pequena demais para o quad achar sozinho na janela de X
+KNEE_LEVELS = (0.0, -1.0, 1.0, -2.0, 2.0, -4.0, 4.0)
+
+
+def _x_mass(a: float, b: float, muX: float, sigmaX: float) -> float:
+    """P(a < X < b), com o lado mais preciso da CDF"""
+    za = (a - muX) / sigmaX
+    zb = (b - muX) / sigmaX
+    if za > 0:
+        return ndtr(-za) - ndtr(-zb)
+    return ndtr(zb) - ndtr(za)
+
+
+def _y_factor(x: float, c: float, muY: float, sigmaY: float):
+    """g(x) se for constante no intervalo que contém x, senão None"""
+    positive_x = x > 0
+    d = c / x - muY
+    if sigmaY <= 0 or abs(d) > BAND_N_SIGMAS * sigmaY:
+        return float((d >= 0) == positive_x)
+    if c == 0:
+        q = ndtr(d / sigmaY)
+        return q if positive_x else 1.0 - q
+    return None
+
+
+def orient(muX: float, sigmaX: float, muY: float, sigmaY: float) -> tuple:
+    """(muX, sigmaX, muY, sigmaY) trocados, se preciso, para Y ser a variável de menor CV"""
+    cv_x = sigmaX / abs(muX) if muX != 0 else math.inf
+    cv_y = sigmaY / abs(muY) if muY != 0 else math.inf
+    if cv_x < cv_y:
+        return muY, sigmaY, muX, sigmaX
+    return muX, sigmaX, muY, sigmaY
+
+
+def x_intervals(c: float, muY: float, sigmaY: float) -> list:
+    """
+    Intervalos (a, b, q, positive_x) que cobrem o eixo x, cortados em zero e nos pontos
+    x = c / (muY +- BAND_N_SIGMAS sigmaY); q é o valor constante de g no intervalo, ou
+    None onde g varia.
+    """
+    cuts = {0.0}
+    for level in (muY - BAND_N_SIGMAS * sigmaY, muY + BAND_N_SIGMAS * sigmaY):
+        if level != 0:
+            cuts.add(c / level)
+    edges = [-math.inf] + sorted(cuts) + [math.inf]
+
+    intervals = []
+    for a, b in zip(edges[:-1], edges[1:]):
+        if a == b:
+            continue
+        # Qualquer ponto interior classifica o intervalo inteiro
+        if math.isinf(a):
+            inner = b - 1.0 - abs(b)
+        elif math.isinf(b):
+            inner = a + 1.0 + abs(a)
+        else:
+            inner = 0.5 * (a + b)
+        intervals.append((a, b, _y_factor(inner, c, muY, sigmaY), inner > 0))
+    return intervals
+
+
+def _decades(a: float, b: float, c: float, sigmaY: float) -> list:
+    """
+    Pontos |c| / sigmaY * 10^j (com o sinal de x) em (a, b). Quando muY +- BAND_N_SIGMAS sigmaY
+    tem sinais opostos, o trecho vai do joelho até a borda da janela e g se aproxima do limite
+    como |c| / (sigmaY |x|): uma cauda que cobre várias décadas de x
+    """
+    if c == 0 or a < 0 < b:
+        return []
+    scale = abs(c) / sigmaY
+    far = max(abs(a), abs(b))
+    sign = 1.0 if b > 0 else -1.0
+    return [sign * scale * 10.0**j for j in range(1, max(math.ceil(math.log10(far / scale)), 0) + 1)]
+
+
+def x_partition(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float, n_sigmas: float = 12.0) -> tuple:
+    """
+    Retorna (massa, trechos): massa é a soma, em forma fechada, dos intervalos em que g
+    é constante; trechos é a lista de (a, b, points, positive_x) que ainda vão para o quad.
+    """
+    if sigmaX <= 0:
+        # X concentrado em muX: P(XY <= c) = g(muX)
+        if muX == 0:
+            return float(c >= 0), []
+        q = _y_factor(muX, c, muY, sigmaY)
+        if q is None:
+            z = (c / muX - muY) / sigmaY
+            q = ndtr(z) if muX > 0 else ndtr(-z)
+        return q, []
+
+    x_lo = muX - n_sigmas * sigmaX
+    x_hi = muX + n_sigmas * sigmaX
+    mass = 0.0
+    pieces = []
+    for a, b, q, positive_x in x_intervals(c, muY, sigmaY):
+        if q is not None:
+            if q > 0:
+                mass += q * _x_mass(a, b, muX, sigmaX)
+            continue
+
+        a, b = max(a, x_lo), min(b, x_hi)
+        if a < b:
+            knees = [c / level for level in (muY + k * sigmaY for k in KNEE_LEVELS) if level != 0]
+            points = sorted({p for p in [muX] + knees + _decades(a, b, c, sigmaY) if a < p < b})
+            pieces.append((a, b, points or None, positive_x))
+
+    return mass, pieces
+
+
+class PartitionResult(tuple):
+    """(valor, erro) de integrate_partition; fallback: algum trecho caiu nas tolerâncias de reserva"""
+
+    def __new__(cls, value: float, err: float, fallback: bool = False):
+        result = super().__new__(cls, (value, err))
+        result.fallback = fallback
+        return result
+
+    def __getnewargs__(self):
+        return (*self, self.fallback)
+
+
+def integrate_partition(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float, integrand,
+                        args_pos: tuple, args_neg: tuple, epsabs: float, epsrel: float,
+                        n_sigmas: float = 12.0, limit: int = 200) -> PartitionResult:
+    """
+    (P(XY <= c), cota de erro) com os parâmetros já orientados. O erro soma as estimativas
+    do quad, Phi(-BAND_N_SIGMAS) dos intervalos planos e a massa de X fora da janela. Se o
+    quad falhar num trecho, tenta com tolerâncias 100x mais frouxas; se falhar de novo, o
+    trecho entra pela metade da massa de X nele, com essa mesma metade como erro (0 <= g <= 1).
+    Nos dois casos o resultado sai com fallback=True.
+    """
+    value, pieces = x_partition(c, muX, sigmaX, muY, sigmaY, n_sigmas=n_sigmas)
+    err = ndtr(-BAND_N_SIGMAS) + 2.0 * ndtr(-n_sigmas)
+    fallback = False
+    for lower, upper, points, positive_x in pieces:
+        args = args_pos if positive_x else args_neg
+        with warnings.catch_warnings():
+            # O aviso de convergência do quad já aparece na estimativa de erro
+            warnings.simplefilter('ignore')
+            try:
+                part, part_err = quad(integrand, lower, upper, args=args, points=points,
+                                      epsabs=epsabs, epsrel=epsrel, limit=limit)
+            except Exception:
+                fallback = True
+                try:
+                    part, part_err = quad(integrand, lower, upper, args=args, points=points,
+                                          epsabs=100 * epsabs, epsrel=100 * epsrel, limit=limit)
+                except Exception:
+                    part = part_err = 0.5 * _x_mass(lower, upper, muX, sigmaX)
+        value += part
+        err += part_err
+    return PartitionResult(value, err, fallback)
+
+
+def integrate_density(c: float, muX: float, sigmaX: float, muY: float, sigmaY: float, density,
+                      orders: tuple = (0,), epsrel: float = 1e-6, n_sigmas: float = 12.0, limit: int = 200) -> list:
+    """
+    [densidade de XY em c, derivada da densidade em c][orders], com os parâmetros já
+    orientados e density(x, c, muX, sigmaX, muY, sigmaY, order) como o density_llc de
+    numbaIntegrand. Com c = 0 a densidade diverge (log) e vale inf.
+    """
+    if c == 0:
+        return [math.inf if order == 0 else math.nan for order in orders]
+    _, pieces = x_partition(c, muX, sigmaX, muY, sigmaY, n_sigmas=n_sigmas)
+    totals = []
+    for order in orders:
+        total = 0.0
+        for lower, upper, points, _ in pieces:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                total += quad(density, lower, upper, args=(c, muX, sigmaX, muY, sigmaY, float(order)),
+                              points=points, epsabs=0.0, epsrel=epsrel, limit=limit)[0]
+        totals.append(total)
+    return totals
+
+
+def refine(evaluate, settled, ladder=TOLERANCE_LADDER) -> tuple:
+    """
+    Chama evaluate(epsabs, epsrel) -> (valor, erro) subindo os degraus de ladder até
+    settled(valor, erro) ser verdadeiro; no último degrau devolve o que tiver. Devolve o
+    resultado de evaluate como veio (um PartitionResult mantém a marca de fallback)
+    """
+    for epsabs, epsrel in ladder:
+        result = evaluate(epsabs, epsrel)
+        if settled(*result):
+            break
+    return result
+
+
+def rounding_settled(decimals: int = 6):
+    """Critério de parada: valor +- erro arredonda para o mesmo número"""
+    return lambda value, err: round(value - err, decimals) == round(value + err, decimals)
+
+
+def sign_settled(target: float):
+    """Critério de parada: o sinal de valor - target não depende do erro"""
+    return lambda value, err: abs(value - target) > err
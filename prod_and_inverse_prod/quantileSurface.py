@@ -0,0 +1,178 @@
+"""
+Superfície de quantis normalizada, pré-calculada, para a inversa.
+
+Com a = sigmaX / |muX|, b = sigmaY / |muY| e U, V normais padrão,
+X = muX (1 + a U) e Y = muY (1 + b V) (o sinal de mu some pela simetria de U e V):
+
+    XY = muX muY W,    W = (1 + a U)(1 + b V)
+
+W tem média 1, desvio s = sqrt(a^2 + b^2 + a^2 b^2) e só depende de (a, b),
+simetricamente. O quantil p de XY é muX muY w(p) quando muX muY > 0 e
+muX muY w(1 - p) quando muX muY < 0. A tabela guarda t = (w - 1) / s, que fica
+perto de ndtri(p), numa grade regular em (r, theta, z) com a = r cos(theta),
+b = r sin(theta) e z = ndtri(p): com CV pequeno t - z ~ a^2 b^2 / s^3, que tem
+um bico em a = b = 0 na grade (a, b) mas é suave em r ao longo de cada theta.
+A consulta é interpolação de Lagrange cúbica nos três eixos, vetorizada nas
+células. O erro da interpolação (maior com CV alto, onde a densidade de W
+diverge em w = 0 e o quantil faz uma cúspide em z) é corrigido por quem chama
+com passos de polimento contra a CDF exata: o Newton/Halley da inversa escalar
+parte do valor da tabela (ver newtonRoot) e a inversa em lote dá passos de
+Newton vetorizados (ver batchProdPpf).
+
+A grade é construída uma vez com o perfil "reference" da inversa escalar
+(python quantileSurface.py, ~1 min) e salva como .npz ao lado do módulo, com a
+versão no nome e dentro do arquivo. O .npz é versionado no repositório: quem
+mudar a grade ou a inversa sobe SURFACE_VERSION e reconstrói o arquivo. Fora
+da grade (hypot(a, b) acima de R_MAX, |z| acima de Z_MAX, mu = 0) a consulta
+devolve nan e quem chama segue pelo chute normal.
+"""
+import math
+import os
+import threading
+import numpy as np
+from scipy.special import ndtr, ndtri
+
+SURFACE_VERSION = 1
+# hypot(CV_X, CV_Y) até R_MAX cobre os dois CV até 2
+R_MAX = 3.0
+N_R = 61
+N_THETA = 31
+Z_MAX = 6.0
+N_Z = 49
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"quantile_surface_v{SURFACE_VERSION}.npz")
+
+_STENCIL = np.arange(4)
+
+_surfaces = {}
+_surfaces_lock = threading.Lock()
+# Guardado em _surfaces quando o arquivo falta: get_surface não volta ao disco a cada chamada
+_MISSING = object()
+
+
+class QuantileSurface:
+    """t = (w - 1) / s na grade r_grid x theta_grid x z_grid (ver o docstring do módulo)"""
+
+    def __init__(self, r_grid: np.ndarray, theta_grid: np.ndarray, z_grid: np.ndarray, t: np.ndarray):
+        if t.shape != (r_grid.size, theta_grid.size, z_grid.size):
+            raise ValueError(f"Superfície com formato {t.shape}, esperado "
+                             f"{(r_grid.size, theta_grid.size, z_grid.size)}")
+        self.r_grid = r_grid
+        self.theta_grid = theta_grid
+        self.z_grid = z_grid
+        self.t = t
+
+    def save(self, path: str = DEFAULT_PATH) -> None:
+        """Grava o .npz; o os.replace final evita que outro processo leia um arquivo pela metade"""
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp, version=SURFACE_VERSION, r_grid=self.r_grid, theta_grid=self.theta_grid, z_grid=self.z_grid,
+                 t=self.t)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> "QuantileSurface":
+        with np.load(path) as data:
+            version = int(data["version"])
+            if version != SURFACE_VERSION:
+                raise ValueError(f"Superfície {path} na versão {version}, esperada {SURFACE_VERSION}")
+            return cls(data["r_grid"], data["theta_grid"], data["z_grid"], data["t"])
+
+    def _interpolate(self, r: np.ndarray, theta: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """Interpolação de Lagrange cúbica (4 x 4 x 4 nós em volta do ponto) de t, nan fora da grade"""
+        inside = (r <= self.r_grid[-1]) & (np.abs(z) <= self.z_grid[-1])
+        index, weights = [], []
+        for v, grid in ((r, self.r_grid), (theta, self.theta_grid), (z, self.z_grid)):
+            pos = (np.where(inside, v, grid[0]) - grid[0]) / (grid[1] - grid[0])
+            # Primeiro dos 4 nós, deslocado para dentro nas bordas da grade
+            first = np.clip(np.floor(pos).astype(np.int64) - 1, 0, grid.size - 4)
+            index.append(first[..., None] + _STENCIL)
+            weights.append(np.stack(_cubic_weights(pos - first), axis=-1))
+        (i, j, k), (wi, wj, wk) = index, weights
+        block = self.t[i[..., :, None, None], j[..., None, :, None], k[..., None, None, :]]
+        result = np.einsum('...i,...j,...k,...ijk->...', wi, wj, wk, block)
+        return np.where(inside, result, np.nan)
+
+    def quantile_1d(self, muX: float, sigmaX: float, muY: float, sigmaY: float, p: float) -> float:
+        """quantile para uma célula, sem o custo fixo dos arrays (a inversa escalar consulta uma vez por solve)"""
+        mean = muX * muY
+        if mean == 0:
+            return math.nan
+        a, b = sigmaX / abs(muX), sigmaY / abs(muY)
+        r, z = math.hypot(a, b), float(ndtri(1.0 - p if mean < 0 else p))
+        if not (r <= self.r_grid[-1] and abs(z) <= self.z_grid[-1]):
+            return math.nan
+        first, weights = [], []
+        for v, grid in ((r, self.r_grid), (math.atan2(b, a), self.theta_grid), (z, self.z_grid)):
+            pos = (v - grid[0]) / (grid[1] - grid[0])
+            start = min(max(math.floor(pos) - 1, 0), grid.size - 4)
+            first.append(start)
+            weights.append(_cubic_weights(pos - start))
+        (i, j, k), (wi, wj, wk) = first, weights
+        t = float(np.einsum('i,j,k,ijk->', wi, wj, wk, self.t[i:i + 4, j:j + 4, k:k + 4]))
+        return mean * (1.0 + math.sqrt(a**2 + b**2 + a**2 * b**2) * t)
+
+    def quantile(self, muX, sigmaX, muY, sigmaY, p):
+        """Quantil p de XY pela tabela (arrays broadcastados entre si); nan fora da grade"""
+        muX, sigmaX, muY, sigmaY, p = np.broadcast_arrays(
+            *(np.asarray(v, dtype=np.float64) for v in (muX, sigmaX, muY, sigmaY, p))
+        )
+        mean = muX * muY
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a = np.where(muX != 0, sigmaX / np.abs(muX), np.inf)
+            b = np.where(muY != 0, sigmaY / np.abs(muY), np.inf)
+            z = ndtri(np.where(mean < 0, 1.0 - p, p))
+            theta = np.arctan2(b, a)
+        s = np.sqrt(a**2 + b**2 + a**2 * b**2)
+        return (mean * (1.0 + s * self._interpolate(np.hypot(a, b), theta, z)))[()]
+
+
+def _cubic_weights(u):
+    """Pesos de Lagrange dos nós 0, 1, 2, 3 do estêncil em u (posição relativa ao primeiro; escalar ou array)"""
+    u1, u2, u3 = u - 1.0, u - 2.0, u - 3.0
+    return [-u1 * u2 * u3 / 6.0, u * u2 * u3 / 2.0, -u * u1 * u3 / 2.0, u * u1 * u2 / 6.0]
+
+
+def build_surface(r_max: float = R_MAX, n_r: int = N_R, n_theta: int = N_THETA, z_max: float = Z_MAX,
+                  n_z: int = N_Z, profile: str = "reference") -> QuantileSurface:
+    """Resolve a grade inteira com a inversa escalar (muX = muY = 1) no perfil dado; W é simétrica em theta = pi/4"""
+    from inverseProdOfTwoVariables import InverseProdOfTwoVariables
+
+    r_grid = np.linspace(0.0, r_max, n_r)
+    theta_grid = np.linspace(0.0, 0.5 * np.pi, n_theta)
+    z_grid = np.linspace(-z_max, z_max, n_z)
+    t = np.empty((n_r, n_theta, n_z))
+    # W constante em r = 0: o limite de t é z
+    t[0] = z_grid
+    for i, r in enumerate(r_grid[1:], start=1):
+        for j in range((n_theta + 1) // 2):
+            a, b = r * np.cos(theta_grid[j]), r * np.sin(theta_grid[j])
+            s = np.sqrt(a**2 + b**2 + a**2 * b**2)
+            for k, z in enumerate(z_grid):
+                solver = InverseProdOfTwoVariables(1.0, a, 1.0, b, target_p=float(ndtr(z)), profile=profile)
+                solver.use_surface = False
+                solver.solve_inverse_cdf(n_samples=1)
+                t[i, j, k] = (solver.c_solution - 1.0) / s
+            t[i, n_theta - 1 - j] = t[i, j]
+    return QuantileSurface(r_grid, theta_grid, z_grid, t)
+
+
+def get_surface(path: str = DEFAULT_PATH, build: bool = False):
+    """
+    Instância compartilhada no processo; None se o arquivo não existir. Com build=True, a
+    primeira chamada constrói e grava a superfície quando ela falta
+    """
+    with _surfaces_lock:
+        surface = _surfaces.get(path)
+        if surface is None or (surface is _MISSING and build):
+            if not os.path.exists(path):
+                if not build:
+                    _surfaces[path] = _MISSING
+                    return None
+                build_surface().save(path)
+            surface = _surfaces[path] = QuantileSurface.load(path)
+        return None if surface is _MISSING else surface
+
+
+if __name__ == "__main__":
+    superficie = build_surface()
+    superficie.save()
+    print(f"Superfície gravada em {DEFAULT_PATH}: {superficie.t.shape}")
@@ -0,0 +1,96 @@
+"""
+Banco de pares normais padrão (zx, zy) em disco, compartilhado por todas as células.
+
+Só a transformação afim mu + sigma*z muda entre células, então o banco é gerado
+uma vez (semente fixa), salvo como .npy e aberto com memória mapeada: threads,
+processos e execuções seguintes leem as mesmas páginas do cache do sistema e o
+gerador aleatório sai do caminho quente.
+
+Cada simulação lê o banco a partir de um deslocamento; com rotate=True o
+deslocamento é sorteado com o rng da tarefa (reproduzível, ver main.MC_SEED),
+com rotate=False todas as células usam o mesmo trecho (números aleatórios comuns).
+Simulações com mais amostras que o banco dão a volta e reutilizam pares.
+"""
+import os
+import threading
+import numpy as np
+
+DEFAULT_BANK_SIZE = 1 << 22
+DEFAULT_BANK_SEED = 20240601
+DEFAULT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+_GENERATION_CHUNK = 1 << 20
+
+_banks = {}
+_banks_lock = threading.Lock()
+
+
+class NormalBank:
+    def __init__(
+        self,
+        size: int = DEFAULT_BANK_SIZE,
+        seed: int = DEFAULT_BANK_SEED,
+        directory: str = None,
+        dtype=np.float64,
+        rotate: bool = True
+    ):
+        self.size = size
+        self.seed = seed
+        self.dtype = np.dtype(dtype)
+        self.rotate = rotate
+        self.path = os.path.join(directory or DEFAULT_DIRECTORY,
+                                 f"normal_bank_{size}_{seed}_{self.dtype.name}.npy")
+
+        if not os.path.exists(self.path):
+            self._generate()
+        self.pairs = np.load(self.path, mmap_mode='r')
+        if self.pairs.shape != (2, size) or self.pairs.dtype != self.dtype:
+            raise ValueError(f"Banco {self.path} corrompido: shape {self.pairs.shape}, dtype {self.pairs.dtype}")
+
+    def _generate(self):
+        """Gera em blocos direto no arquivo; o os.replace final evita que outro processo leia um banco pela metade"""
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        out = np.lib.format.open_memmap(tmp, mode='w+', dtype=self.dtype, shape=(2, self.size))
+        rng = np.random.default_rng(np.random.SeedSequence(self.seed))
+        for start in range(0, self.size, _GENERATION_CHUNK):
+            stop = min(start + _GENERATION_CHUNK, self.size)
+            out[:, start:stop] = rng.standard_normal((2, stop - start), dtype=self.dtype)
+        out.flush()
+        del out
+        os.replace(tmp, self.path)
+
+    def cursor(self, rng: np.random.Generator = None) -> "BankCursor":
+        """Leitor sequencial a partir do deslocamento desta simulação"""
+        offset = 0
+        if self.rotate:
+            offset = int((np.random.default_rng() if rng is None else rng).integers(self.size))
+        return BankCursor(self.pairs, offset)
+
+
+class BankCursor:
+    """Entrega os pares do banco em sequência, dando a volta no fim"""
+
+    def __init__(self, pairs: np.ndarray, offset: int):
+        self.pairs = pairs
+        self.pos = offset
+
+    def draw(self, size: int, dtype=np.float64) -> tuple:
+        """(zx, zy) com size elementos cada, copiados para arrays graváveis no dtype pedido"""
+        n = self.pairs.shape[1]
+        stop = self.pos + size
+        if stop <= n:
+            block = np.array(self.pairs[:, self.pos:stop], dtype=dtype)
+        else:
+            idx = np.arange(self.pos, stop) % n
+            block = np.array(self.pairs[:, idx], dtype=dtype)
+        self.pos = stop % n
+        return block[0], block[1]
+
+
+def get_bank(size: int = DEFAULT_BANK_SIZE, seed: int = DEFAULT_BANK_SEED, directory: str = None,
+             dtype=np.float64, rotate: bool = True) -> NormalBank:
+    """Instância compartilhada no processo; a primeira chamada gera o arquivo se ele não existir"""
+    key = (size, seed, directory, np.dtype(dtype).name, rotate)
+    with _banks_lock:
+        if key not in _banks:
+            _banks[key] = NormalBank(size, seed, directory, dtype, rotate)
+        return _banks[key]
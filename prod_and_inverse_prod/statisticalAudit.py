@@ -0,0 +1,168 @@
+"""
+Auditoria estatística: validação Monte Carlo numa amostra das células, não em todas.
+
+No modo auditoria do main, LB e probabilidades saem para todas as células sem
+Monte Carlo. Depois, select_audit e risk_reasons escolhem as células que passam
+pela validação:
+
+- uma amostra aleatória estratificada: fraction de cada estrato (a matriz da
+  partição), com pelo menos MIN_PER_STRATUM. É ela que estima a taxa de
+  discordância da tabela inteira;
+- toda célula de risco: p extremo (min(p, 1 - p) < EXTREME_P), CV de um dos
+  fatores >= HIGH_CV, ou solução que veio por um caminho de reserva
+  (FALLBACK_METHODS).
+
+Células em forma fechada (ver closedFormProd) não têm o que validar e ficam de
+fora, como já acontecia por célula. AuditReport junta, para cada célula
+auditada, a probabilidade numérica e a do Monte Carlo com a meia-largura do IC
+95%. No resumo, a fração de células fora do IC na amostra aleatória vem com
+intervalo de Wilson; sem erro numérico, essa fração fica perto de 5%.
+"""
+import math
+import numpy as np
+from scipy.special import ndtri
+from closedFormProd import POINT_MASS, SCALED_NORMAL, BESSEL_K0
+from monteCarlo import wilson_halfwidth
+
+DEFAULT_FRACTION = 0.05
+MIN_PER_STRATUM = 2
+EXTREME_P = 1e-3
+HIGH_CV = 1.0
+# solution_method da inversa escalar quando o Newton/Halley não converge (brentq, fsolve ou o chute) e
+# numerical_method/solution_method quando algum trecho do quad só passou com as tolerâncias de reserva
+FALLBACK_METHODS = ("brentq", "quad_fallback")
+EXACT_METHODS = (POINT_MASS, SCALED_NORMAL, BESSEL_K0)
+N_WORST = 10
+
+
+def _cv(mu: float, sigma: float) -> float:
+    if mu == 0:
+        return math.inf if sigma > 0 else 0.0
+    return sigma / abs(mu)
+
+
+def risk_reasons(p: float, muX: float, sigmaX: float, muY: float, sigmaY: float, method: str) -> list:
+    """Motivos para auditar a célula sempre (lista vazia se nenhum)"""
+    reasons = []
+    if min(p, 1.0 - p) < EXTREME_P:
+        reasons.append("p extremo")
+    if max(_cv(muX, sigmaX), _cv(muY, sigmaY)) >= HIGH_CV:
+        reasons.append("CV alto")
+    if method in FALLBACK_METHODS:
+        reasons.append(f"reserva ({method})")
+    return reasons
+
+
+def wilson_interval(k: int, n: int, confidence: float = 0.95) -> tuple:
+    """Intervalo de Wilson para a proporção k / n"""
+    z = ndtri(0.5 + confidence / 2)
+    rate = k / n
+    center = (rate + z**2 / (2 * n)) / (1 + z**2 / n)
+    half = wilson_halfwidth(rate, n, confidence)
+    return max(center - half, 0.0), min(center + half, 1.0)
+
+
+def select_audit(strata: list, fraction: float = DEFAULT_FRACTION, rng: np.random.Generator = None,
+                 min_per_stratum: int = MIN_PER_STRATUM) -> np.ndarray:
+    """Máscara da amostra aleatória: ceil(fraction n) células de cada estrato, ao menos min_per_stratum"""
+    rng = np.random.default_rng() if rng is None else rng
+    strata = np.asarray(strata, dtype=object)
+    sampled = np.zeros(strata.size, dtype=bool)
+    for stratum in dict.fromkeys(strata):
+        members = np.flatnonzero(strata == stratum)
+        size = min(members.size, max(math.ceil(fraction * members.size), min_per_stratum))
+        sampled[rng.choice(members, size=size, replace=False)] = True
+    return sampled
+
+
+class AuditRecord:
+    """
+    Uma célula auditada: p numérico contra o Monte Carlo (mc_p, com meia-largura halfwidth do
+    IC 95%); sampled se veio da amostra aleatória, reasons os motivos de risco
+    """
+
+    def __init__(self, label: str, stratum: str, p: float, mc_p: float, halfwidth: float, sampled: bool,
+                 reasons: list):
+        self.label = label
+        self.stratum = stratum
+        self.p = p
+        self.mc_p = mc_p
+        self.halfwidth = halfwidth
+        self.sampled = sampled
+        self.reasons = reasons
+
+    @property
+    def diff(self) -> float:
+        return abs(self.p - self.mc_p)
+
+    @property
+    def outside(self) -> bool:
+        """Numérico fora do IC 95% do Monte Carlo; com meia-largura 0 (MC exato) só conta se diferir"""
+        if self.halfwidth == 0:
+            return self.diff > 1e-12
+        return self.diff > self.halfwidth
+
+
+class AuditReport:
+    """Registros da auditoria e o resumo (n_cells: células da execução; n_exact: em forma fechada)"""
+
+    def __init__(self, n_cells: int, n_exact: int = 0):
+        self.n_cells = n_cells
+        self.n_exact = n_exact
+        self.records = []
+
+    def add(self, record: AuditRecord) -> None:
+        self.records.append(record)
+
+    def summary(self) -> str:
+        sampled = [r for r in self.records if r.sampled]
+        risky = [r for r in self.records if r.reasons]
+        lines = [
+            "=== AUDITORIA ESTATÍSTICA (MONTE CARLO) ===",
+            f"Células: {self.n_cells} ({self.n_exact} em forma fechada, sem validação)",
+            f"Auditadas: {len(self.records)} (amostra aleatória: {len(sampled)}, risco: {len(risky)}, "
+            f"nas duas: {sum(1 for r in sampled if r.reasons)})",
+        ]
+        if not self.records:
+            return "\n".join(lines)
+
+        reasons = {}
+        for r in risky:
+            for reason in r.reasons:
+                reasons[reason] = reasons.get(reason, 0) + 1
+        if reasons:
+            lines.append("Motivos de risco: " + ", ".join(f"{k}: {v}" for k, v in reasons.items()))
+
+        diffs = np.array([r.diff for r in self.records])
+        worst = self.records[int(np.argmax(diffs))]
+        lines.append(f"|numérico - MC|: média {diffs.mean():.2e}, máximo {worst.diff:.2e} ({worst.label}); "
+                     f"meia-largura média do IC {np.mean([r.halfwidth for r in self.records]):.2e}")
+        for name, group in (("amostra aleatória", sampled), ("células de risco", risky)):
+            if not group:
+                continue
+            n_out = sum(r.outside for r in group)
+            low, high = wilson_interval(n_out, len(group))
+            lines.append(f"Fora do IC 95% ({name}): {n_out}/{len(group)} = {n_out / len(group):.1%} "
+                         f"[Wilson {low:.1%}, {high:.1%}]")
+
+        lines.append("Por estrato (auditadas, fora do IC, máx |dif|):")
+        for stratum in dict.fromkeys(r.stratum for r in self.records):
+            group = [r for r in self.records if r.stratum == stratum]
+            lines.append(f"  {stratum}: {len(group)}, {sum(r.outside for r in group)}, "
+                         f"{max(r.diff for r in group):.2e}")
+
+        lines.append(f"Maiores desvios em meias-larguras do IC (até {N_WORST}):")
+        ranked = sorted(self.records, key=lambda r: r.diff / r.halfwidth if r.halfwidth else math.inf, reverse=True)
+        for r in ranked[:N_WORST]:
+            lines.append(f"  {r.label}: p={r.p:.6f} MC={r.mc_p:.6f} +- {r.halfwidth:.1e}"
+                         + (f" [{', '.join(r.reasons)}]" if r.reasons else ""))
+        return "\n".join(lines)
+
+    def write(self, path: str) -> None:
+        """Resumo seguido de uma linha por célula auditada (separada por ;)"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.summary() + "\n\n")
+            f.write("celula;estrato;p;mc_p;meia_largura;fora_ic;amostra;motivos\n")
+            for r in self.records:
+                f.write(f"{r.label};{r.stratum};{r.p:.6f};{r.mc_p:.6f};{r.halfwidth:.3e};{int(r.outside)};"
+                        f"{int(r.sampled)};{','.join(r.reasons)}\n")